@@ -8,6 +8,9 @@ class Settings(BaseSettings):
     # URL подключения к базе данных PostgreSQL с asyncpg драйвером
     DATABASE_URL: str
 
+    # URL реплики только для чтения (если не задан - читаем из основной БД)
+    DATABASE_READ_URL: str | None = None
+
     # Секретный ключ для JWT токенов
     SECRET_KEY: str
 
@@ -19,7 +22,14 @@ class Settings(BaseSettings):
 
     # Настройки пула подключений к PostgreSQL
     POSTGRES_POOL_SIZE: int = 20
-    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 20
+    POSTGRES_POOL_TIMEOUT: int = 10  # Секунды ожидания свободного соединения
+    POSTGRES_POOL_RECYCLE: int = 1800  # Пересоздание соединений старше 30 минут
+
+    # Кэш скомпилированных SQLAlchemy выражений (на engine) и
+    # кэш prepared statements asyncpg (на каждое соединение пула)
+    POSTGRES_QUERY_CACHE_SIZE: int = 1200
+    POSTGRES_PREPARED_STATEMENT_CACHE_SIZE: int = 500
 
     # WebSocket reconnection settings
     DISCONNECT_TIMEOUT_SECONDS: int = 30  # Grace period before forfeit
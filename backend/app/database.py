@@ -1,7 +1,10 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Callable
 
+import orjson
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
+    AsyncEngine,
     async_sessionmaker,
     AsyncSession,
 )
@@ -10,14 +13,45 @@ from app.config import settings
 from app.models import Base
 
 
+def _orjson_dumps(value: Any) -> str:
+    """Сериализация JSON/JSONB колонок через orjson (диалект ожидает str)."""
+    return orjson.dumps(value).decode()
+
+
 # Создание асинхронного двигателя для подключения к PostgreSQL
-async_engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_size=settings.POSTGRES_POOL_SIZE,
-    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
-)
+# json_serializer/json_deserializer подставляются в JSON/JSONB-кодеки asyncpg диалекта:
+# значение (например Task.hints) декодируется один раз сразу в list через orjson
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=True,  # Отбрасываем разорванные соединения до выдачи в сессию
+        json_serializer=_orjson_dumps,
+        json_deserializer=orjson.loads,
+        # Горячие запросы не компилируются заново на каждый запрос (SQLAlchemy),
+        # а на стороне PostgreSQL выполняются как уже подготовленные (asyncpg)
+        query_cache_size=settings.POSTGRES_QUERY_CACHE_SIZE,
+        connect_args={
+            "prepared_statement_cache_size": settings.POSTGRES_PREPARED_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+async_engine = _create_engine(settings.DATABASE_URL)
+
+# Двигатель только для чтения: транзакции открываются как READ ONLY.
+# Если задан DATABASE_READ_URL (реплика) - отдельный пул, иначе общий пул с основной БД
+# (флаг readonly сбрасывается при возврате соединения в пул)
+async_read_engine = (
+    _create_engine(settings.DATABASE_READ_URL)
+    if settings.DATABASE_READ_URL
+    else async_engine
+).execution_options(postgresql_readonly=True)
 
 # Фабрика для создания асинхронных сессий
 async_session_maker = async_sessionmaker(
@@ -26,6 +60,13 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Фабрика сессий для read-only endpoint'ов
+async_read_session_maker = async_sessionmaker(
+    async_read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 # Функция для получения сессии БД (используется как dependency injection в FastAPI)
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -42,6 +83,35 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_db_ro() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Зависимость для endpoint'ов, которые только читают данные.
+
+    Транзакция открывается как READ ONLY (и идет на реплику, если она настроена),
+    поэтому писать через эту сессию нельзя.
+
+    Yields:
+        AsyncSession: Асинхронная read-only сессия
+    """
+    async with async_read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[..., None], *args: Any) -> None:
+    """
+    Выполняет callback(*args) один раз после ближайшего commit() сессии.
+
+    Нужна сервисам, которые сами не коммитят (commit делает вызывающий код),
+    но должны сбросить кэши только после фиксации изменений в БД.
+    """
+    event.listen(
+        session.sync_session, "after_commit", lambda _session: callback(*args), once=True
+    )
+
+
 # Функция для инициализации БД (создание всех таблиц)
 async def init_db() -> None:
     """
@@ -1,3 +1,5 @@
+import hmac
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
@@ -6,13 +8,24 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
 from app.models.enums import UserRole
-from app.utils.auth import verify_token
+from app.services.user_cache import cache_user, get_cached_user
+from app.utils.auth import verify_token_cached
 
 
 # Схема безопасности для извлечения Bearer токена из заголовка Authorization
 security = HTTPBearer()
 
 
+def _role_matches(role: str | None, expected_role: str) -> bool:
+    """
+    Сравнение ролей за постоянное время (hmac.compare_digest).
+
+    Время проверки не зависит от длины совпадающего префикса,
+    поэтому не даёт timing side-channel при подборе значений.
+    """
+    return hmac.compare_digest((role or "").encode(), expected_role.encode())
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -42,18 +55,25 @@ async def get_current_user(
     # Извлекаем сам токен из credentials (credentials.credentials содержит строку токена)
     token = credentials.credentials
 
-    # Декодируем и проверяем токен (verify_token выбросит HTTPException при ошибке)
-    payload = verify_token(token)
+    # Декодируем и проверяем токен (выбросит HTTPException при ошибке);
+    # результат кэшируется, подпись повторяющегося токена не проверяется заново
+    payload = verify_token_cached(token)
 
     # Извлекаем user_id из payload (должен быть в поле "sub" согласно JWT стандарту)
     user_id: str | None = payload.get("sub")
-    if user_id is None:
+    if not isinstance(user_id, str) or not user_id.isdigit():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Не авторизован",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Пользователь из короткого кэша (повторные запросы того же пользователя
+    # не ходят в БД); объект только для чтения - изменять его в endpoint'ах нельзя
+    cached_user = get_cached_user(int(user_id))
+    if cached_user is not None:
+        return cached_user
+
     # Получаем пользователя из БД по ID (используем async/await паттерн)
     query = select(User).where(User.id == int(user_id))
     result = await db.execute(query)
@@ -67,7 +87,9 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    # Endpoint получает transient-копию из снимка, как и при попадании в кэш:
+    # rollback сессии запроса не сделает current_user непригодным
+    return cache_user(user)
 
 
 def require_role(required_role: UserRole):
@@ -107,7 +129,7 @@ def require_role(required_role: UserRole):
             HTTPException 403: Если у пользователя недостаточно прав
         """
         # Сравниваем роль пользователя с требуемой ролью
-        if current_user.role != required_role.value:
+        if not _role_matches(current_user.role, required_role.value):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Недостаточно прав. Требуется роль: {required_role.value}",
@@ -147,7 +169,7 @@ async def get_admin_user(
         - 403 Forbidden: токен валиден, но у пользователя нет прав администратора
     """
     # Проверяем роль пользователя
-    if current_user.role != UserRole.ADMIN.value:
+    if not _role_matches(current_user.role, UserRole.ADMIN.value):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав. Требуется роль администратора",
@@ -1,14 +1,12 @@
 import logging
 import os
-import sys
 import json
 from pathlib import Path
 
-# print("===== DEBUG: main.py loading =====", file=sys.stderr)
-
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select, func, delete
 
 from app.database import init_db, async_session_maker
@@ -18,20 +16,18 @@ from app.websocket.pvp import router as websocket_router
 from app.routers.stats import router as stats_router
 from datetime import datetime, timedelta
 
-# print("===== DEBUG: imports done =====", file=sys.stderr)
 
 # Логирование
 logger = logging.getLogger(__name__)
 
 # Создание FastAPI приложения
-# print("===== DEBUG: creating FastAPI app =====", file=sys.stderr)
 app = FastAPI(
     title="Olympiad Platform API",
     description="API для олимпиадной платформы",
     version="1.0.0",
-    default_response_class=JSONResponse,
+    # orjson сериализует ответы (включая datetime) в разы быстрее stdlib json
+    default_response_class=ORJSONResponse,
 )
-# print("===== DEBUG: FastAPI app created =====", file=sys.stderr)
 
 
 # Конфигурация CORS
@@ -56,6 +52,11 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
+# Сжатие ответов gzip, если клиент его принимает (Accept-Encoding).
+# StreamingResponse (экспорт задач) сжимается по мере отдачи чанков;
+# ответы меньше 1KB не сжимаем - выигрыш меньше накладных расходов
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # Logging middleware для отладки CORS
 @app.middleware("http")
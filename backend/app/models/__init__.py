@@ -4,7 +4,8 @@ from app.models.task import Task
 from app.models.attempt import UserTaskAttempt
 from app.models.achievement import UserAchievement
 from app.models.match import Match, MatchTask, MatchAnswer
-from app.models.enums import UserRole, MatchStatus
+from app.models.import_job import ImportJob
+from app.models.enums import UserRole, MatchStatus, ImportJobStatus
 
 __all__ = [
     "Base",
@@ -15,6 +16,8 @@ __all__ = [
     "Match",
     "MatchTask",
     "MatchAnswer",
+    "ImportJob",
     "UserRole",
     "MatchStatus",
+    "ImportJobStatus",
 ]
@@ -1,5 +1,5 @@
-from sqlalchemy import ForeignKey, Index, Text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index, Text, desc, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
 
@@ -40,12 +40,39 @@ class UserTaskAttempt(Base):
         index=True  # Индекс для быстрого подсчёта правильных ответов
     )
 
+    # ===== Relationships =====
+
+    # Задача попытки
+    # lazy="raise_on_sql" — неявная ленивая загрузка запрещена: запрос, которому нужна
+    # задача, обязан явно указать selectinload(UserTaskAttempt.task), иначе списки
+    # попыток (недавняя активность) незаметно превратятся в N+1.
+    # viewonly=True — связь только для чтения, task_id задаётся напрямую
+    task: Mapped["Task"] = relationship(
+        "Task",
+        lazy="raise_on_sql",
+        viewonly=True,
+    )
+
     # Композитные индексы для эффективных запросов статистики
     __table_args__ = (
         # Для запросов "все попытки пользователя по конкретной задаче"
         Index('ix_user_task_attempts_user_task', 'user_id', 'task_id'),
-        # Для запросов "правильные попытки пользователя"
-        Index('ix_user_task_attempts_user_correct', 'user_id', 'is_correct'),
-        # Для запросов "последние попытки пользователя" (с сортировкой)
-        Index('ix_user_task_attempts_user_created', 'user_id', 'created_at'),
+        # Для запросов "правильные/решённые задачи пользователя":
+        # task_id в ключе - COUNT(DISTINCT task_id) и JOIN к tasks читают только индекс
+        Index('ix_uta_user_correct_task', 'user_id', 'is_correct', 'task_id'),
+        # Для запросов "последние попытки пользователя" (ORDER BY created_at DESC LIMIT):
+        # task_id/is_correct в INCLUDE - recent activity без чтения таблицы
+        Index(
+            'ix_uta_user_created',
+            'user_id',
+            desc('created_at'),
+            postgresql_include=['task_id', 'is_correct'],
+        ),
+        # Частичный индекс только по правильным попыткам:
+        # COUNT(*) WHERE is_correct (админская статистика) -> index-only scan
+        Index(
+            'ix_uta_correct_partial',
+            'user_id',
+            postgresql_where=text('is_correct = TRUE'),
+        ),
     )
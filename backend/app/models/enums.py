@@ -43,3 +43,24 @@ class MatchStatus(str, Enum):
     def __str__(self) -> str:
         """Возвращает строковое значение статуса"""
         return self.value
+
+
+class ImportJobStatus(str, Enum):
+    """
+    Enum для статуса фонового импорта задач.
+
+    Статусы:
+    - PENDING: файл принят, обработка ещё не началась
+    - RUNNING: идёт разбор, валидация и вставка задач
+    - DONE: задачи успешно добавлены
+    - FAILED: импорт провален (ошибки валидации или формата), ничего не добавлено
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __str__(self) -> str:
+        """Возвращает строковое значение статуса"""
+        return self.value
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import ImportJobStatus
+
+
+class ImportJob(Base):
+    """
+    Модель фонового импорта задач из файла.
+
+    Большие файлы импортируются вне HTTP-запроса; запись хранит статус
+    обработки, чтобы его можно было запросить с любого воркера.
+    """
+
+    __tablename__ = "import_jobs"
+
+    # Администратор, загрузивший файл
+    admin_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    # Имя загруженного файла (для отображения в админке)
+    filename: Mapped[Optional[str]] = mapped_column(
+        String(255),
+        nullable=True,
+    )
+
+    # Статус: pending, running, done, failed
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default=ImportJobStatus.PENDING.value,
+    )
+
+    # Количество задач в файле (известно после разбора)
+    total: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True,
+    )
+
+    # Количество добавленных задач
+    created: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True,
+    )
+
+    # Описание ошибки, если импорт провален
+    error: Mapped[Optional[str]] = mapped_column(
+        Text,
+        nullable=True,
+    )
@@ -6,9 +6,11 @@ from sqlalchemy import (
     Index,
     Text,
     CheckConstraint,
-    Enum as SAEnum,
+    SmallInteger,
+    TypeDecorator,
     func,
     desc,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -16,6 +18,44 @@ from app.models.base import Base
 from app.models.enums import MatchStatus
 
 
+# Коды статусов матча в БД. Порядок фиксирован: значения уже лежат в таблице,
+# новые статусы добавлять только в конец.
+MATCH_STATUS_CODES: dict[MatchStatus, int] = {
+    MatchStatus.WAITING: 0,
+    MatchStatus.ACTIVE: 1,
+    MatchStatus.FINISHED: 2,
+    MatchStatus.CANCELLED: 3,
+    MatchStatus.ERROR: 4,
+}
+_MATCH_STATUS_BY_CODE: dict[int, MatchStatus] = {
+    code: status for status, code in MATCH_STATUS_CODES.items()
+}
+
+
+class MatchStatusType(TypeDecorator):
+    """
+    Хранит MatchStatus как SMALLINT вместо VARCHAR.
+
+    Ключ индекса фиксированной ширины (2 байта) вместо строки с varlena overhead:
+    индексы по status в несколько раз меньше и сравнения целочисленные.
+    Снаружи тип прозрачен: в запросах можно сравнивать с MatchStatus или
+    строкой ("finished"), из БД всегда возвращается MatchStatus.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return MATCH_STATUS_CODES[MatchStatus(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _MATCH_STATUS_BY_CODE[value]
+
+
 class Match(Base):
     """
     Модель 1v1 матча между двумя игроками.
@@ -39,16 +79,11 @@ class Match(Base):
     )
 
     # Статус матча: waiting, active, finished, cancelled, error
-    # SAEnum(MatchStatus, native_enum=False) генерирует VARCHAR + CHECK на PostgreSQL
-    # values_callable нужен чтобы хранить .value ("waiting") а не .name ("WAITING")
+    # Хранится как SMALLINT (см. MATCH_STATUS_CODES), в Python всегда MatchStatus
     status: Mapped[MatchStatus] = mapped_column(
-        SAEnum(
-            MatchStatus,
-            native_enum=False,
-            values_callable=lambda e: [m.value for m in e],
-        ),
+        MatchStatusType(),
         default=MatchStatus.WAITING,
-        server_default=MatchStatus.WAITING.value,
+        server_default=str(MATCH_STATUS_CODES[MatchStatus.WAITING]),
         nullable=False,
         index=True,
     )
@@ -90,9 +125,11 @@ class Match(Base):
     # lazy="selectin" — async-safe: загружает MatchTask одним IN-query после загрузки Match
     # cascade="all, delete-orphan" — удаляет MatchTask если Match удалён
     # passive_deletes=True — опирается на DB-level CASCADE, не загружает детей перед DELETE
+    # order_by — задачи приходят из БД уже по порядку в матче (ix_match_tasks_match_order)
     tasks: Mapped[List["MatchTask"]] = relationship(
         "MatchTask",
         back_populates="match",
+        order_by="MatchTask.task_order",
         lazy="selectin",
         cascade="all, delete-orphan",
         passive_deletes=True,
@@ -140,6 +177,17 @@ class Match(Base):
         Index("ix_matches_player1_status", "player1_id", "status"),
         Index("ix_matches_player2_status", "player2_id", "status"),
         Index("ix_matches_status_created", "status", "created_at"),
+        # Частичный индекс только по незавершённым матчам (waiting/active):
+        # их единицы на фоне всей истории, поэтому индекс крошечный -
+        # счётчик активных матчей и поиск waiting-матча читают только его
+        Index(
+            "ix_matches_status_open",
+            "status",
+            postgresql_where=text(
+                f"status IN ({MATCH_STATUS_CODES[MatchStatus.WAITING]}, "
+                f"{MATCH_STATUS_CODES[MatchStatus.ACTIVE]})"
+            ),
+        ),
         # Индексы для истории матчей (НОВЫЕ)
         # Composite index для быстрой выборки матчей player1 упорядоченных по finished_at
         Index(
@@ -195,9 +243,12 @@ class MatchTask(Base):
     )
 
     # Сама задача (справочная информация)
+    # lazy="raise_on_sql" — задача нужна только при выдаче условий матча, и там она
+    # загружается явно (selectinload(Match.tasks).joinedload(MatchTask.task)).
+    # Неявная загрузка падает вместо N+1 и не тянет text/hints в каждый SELECT MatchTask
     task: Mapped["Task"] = relationship(
         "Task",
-        lazy="joined",
+        lazy="raise_on_sql",
     )
 
     __table_args__ = (
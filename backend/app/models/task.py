@@ -1,10 +1,28 @@
-from sqlalchemy import String, Integer, Text, Index
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import JSONB
+from typing import List
+
+from sqlalchemy import JSON, Computed, String, Integer, Text, Index, desc, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
 
 
+# Символы, которые отрезаются по краям ответа при нормализации
+# (те же, что в выражении генерируемой колонки Task.answer_normalized)
+ANSWER_TRIM_CHARS = " \t\r\n"
+
+
+def normalize_answer_sql(value):
+    """
+    SQL-выражение нормализации ответа: lower(btrim(value, ANSWER_TRIM_CHARS)).
+
+    Совпадает с выражением Task.answer_normalized, поэтому ответ игрока нужно
+    нормализовать им же в PostgreSQL, а не str.strip().lower() в Python:
+    strip() отрезает любые Unicode-пробелы, а lower() может расходиться
+    с lower() PostgreSQL для не-ASCII текста.
+    """
+    return func.lower(func.btrim(value, ANSWER_TRIM_CHARS))
+
+
 class Task(Base):
     """
     Модель задачи для олимпиадной платформы.
@@ -54,17 +72,49 @@ class Task(Base):
         nullable=False,
     )
 
+    # Нормализованный ответ (lower + trim) для проверки ответов игроков.
+    # Генерируемая колонка PostgreSQL: вычисляется при каждой записи answer,
+    # поэтому не нужно нормализовать правильный ответ на каждой проверке.
+    # Ответ игрока сравнивается через normalize_answer_sql() - то же выражение
+    answer_normalized: Mapped[str] = mapped_column(
+        Text,
+        Computed("lower(btrim(answer, E' \\t\\r\\n'))", persisted=True),
+    )
+
     # Подсказки в формате JSON массива строк
     # Пример: ["Подсказка 1", "Подсказка 2"]
+    # JSON, а не JSONB: подсказки хранятся и отдаются целиком, запросов внутрь
+    # массива нет, поэтому бинарная декомпозиция при записи ничего не даёт
     hints: Mapped[list[str]] = mapped_column(
-        JSONB,
+        JSON,
         nullable=False,
         default=list,
         server_default='[]'
     )
 
+    # ===== Relationships =====
+
+    # Попытки решения этой задачи (коллекция)
+    # lazy="raise_on_sql" — неявная ленивая загрузка запрещена: запрос, которому нужны
+    # попытки, обязан явно указать selectinload(Task.attempts). Так N+1 в списках
+    # задач (админка, экспорт) не может появиться незаметно.
+    # viewonly=True — записи создаются через UserTaskAttempt, удаление каскадом в БД
+    attempts: Mapped[List["UserTaskAttempt"]] = relationship(
+        "UserTaskAttempt",
+        lazy="raise_on_sql",
+        viewonly=True,
+    )
+
     # Композитные индексы для эффективной фильтрации по нескольким полям
     __table_args__ = (
         Index('ix_tasks_subject_difficulty', 'subject', 'difficulty'),
         Index('ix_tasks_topic_difficulty', 'topic', 'difficulty'),
+        # Индексы под фильтр + сортировку created_at DESC в админском списке задач:
+        # страница читается диапазоном индекса без полной сортировки таблицы
+        Index('ix_tasks_subject_created', 'subject', desc('created_at')),
+        Index('ix_tasks_topic_created', 'topic', desc('created_at')),
+        Index('ix_tasks_difficulty_created', 'difficulty', desc('created_at')),
+        # Без фильтров (и для экспорта) - по created_at DESC, id DESC:
+        # id разрешает равные created_at, по этой паре работает keyset-пагинация
+        Index('ix_tasks_created_id_desc', desc('created_at'), desc('id')),
     )
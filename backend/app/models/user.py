@@ -42,3 +42,23 @@ class User(Base):
         index=True,
         nullable=False
     )
+
+    # Счётчики попыток решения задач (денормализация user_task_attempts).
+    # Увеличиваются атомарным UPDATE вместе с записью попытки (POST /api/tasks/{id}/check),
+    # /me/stats читает их вместо агрегации всей истории попыток
+    total_attempts: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+        nullable=False
+    )
+    correct_attempts: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+        nullable=False
+    )
+    # Количество разных задач, решённых хотя бы раз
+    unique_solved: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+        nullable=False
+    )
@@ -1,21 +1,26 @@
 import logging
 from datetime import datetime
 from math import ceil
-from typing import Optional
-import json
+from operator import itemgetter
+from typing import AsyncIterator, BinaryIO, Optional
 import csv
-from io import StringIO
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select, func
+from io import BytesIO, StringIO, TextIOWrapper
+
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import RowMapping, select, func, delete, insert, update, cast, case
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Float, Numeric
 
-from app.database import get_db
+from app.database import async_read_session_maker, async_session_maker, get_db, get_db_ro
 from app.dependencies.auth import get_admin_user
-from app.models import User, Task, UserTaskAttempt
-from app.schemas.admin import AdminStatsResponse
+from app.models import ImportJob, ImportJobStatus, User, Task, UserTaskAttempt
+from app.schemas.admin import AdminStatsResponse, ImportJobResponse
 from app.schemas.task import (
     TaskCreate,
     TaskUpdate,
@@ -23,22 +28,92 @@ from app.schemas.task import (
     AdminPaginatedTaskResponse,
 )
 from app.services.task_generator import TaskGenerator
+from app.services.user_stats import invalidate_user_stats
 
 
 # Максимальный размер файла для импорта (10MB)
 MAX_IMPORT_FILE_SIZE = 10 * 1024 * 1024
 
+# Время жизни закэшированной статистики платформы (секунды)
+STATS_CACHE_TTL_SECONDS = 30
+
+# Кэш ответа /stats в памяти процесса: метрики меняются медленно,
+# а админка опрашивает эндпоинт при каждой загрузке страницы
+_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+
+# Файлы импорта больше этого размера обрабатываются в фоне (100KB)
+IMPORT_BACKGROUND_THRESHOLD = 100 * 1024
+
+# Обязательные колонки CSV импорта (difficulty приводится к int при валидации)
+IMPORT_CSV_FIELDS = ("subject", "topic", "difficulty", "title", "text", "answer")
+_get_import_csv_fields = itemgetter(*IMPORT_CSV_FIELDS)
+
+# Валидатор списка импортируемых задач (компилируется один раз)
+_TASKS_ADAPTER = TypeAdapter(list[TaskCreate])
+
+# Размер пачки строк при потоковом экспорте задач
+EXPORT_BATCH_SIZE = 500
+
+# Колонки экспорта задач (порядок колонок в CSV)
+EXPORT_FIELDNAMES = ["id", "subject", "topic", "difficulty", "title", "text", "answer", "hints", "created_at"]
+
 # Логирование для audit trail
+# Аргументы передаются %-стилем: строка собирается только если уровень включён,
+# а время записи даёт сам logging (%(asctime)s), без datetime.utcnow() в коде
 logger = logging.getLogger(__name__)
 
 
+# Колонки задачи для списка в админке (ровно поля TaskAdminResponse)
+ADMIN_TASK_COLUMNS = (
+    Task.id,
+    Task.subject,
+    Task.topic,
+    Task.difficulty,
+    Task.title,
+    Task.text,
+    Task.answer,
+    Task.hints,
+    Task.created_at,
+    Task.updated_at,
+)
+
+# Колонки экспорта: Core-выборка строк без создания ORM-объектов
+EXPORT_COLUMNS = tuple(getattr(Task, name) for name in EXPORT_FIELDNAMES)
+
+
+def _task_export_dict(row: RowMapping) -> dict:
+    """Сериализация строки задачи для экспорта (включает answer)."""
+    task = dict(row)
+    task["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+    return task
+
+
+async def _iter_export_rows() -> AsyncIterator[RowMapping]:
+    """
+    Строки задач для экспорта через серверный курсор.
+
+    Задачи читаются пачками по EXPORT_BATCH_SIZE строк, а не все сразу.
+    Сессия принадлежит генератору и живёт ровно столько, сколько идёт отдача
+    ответа: закрывается по окончании или при обрыве соединения клиентом.
+    """
+    query = (
+        select(*EXPORT_COLUMNS)
+        .order_by(Task.created_at.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with async_read_session_maker() as session:
+        result = await session.stream(query)
+        async for row in result.mappings():
+            yield row
+
+
 # API роутер для админ панели
 # ВАЖНО: dependencies=[Depends(get_admin_user)] применяется ко ВСЕМ эндпоинтам роутера
 # Это защищает весь роутер, не нужно добавлять проверку к каждому эндпоинту
 router = APIRouter(
     prefix="/api/admin",
     tags=["admin"],
-    dependencies=[Depends(get_admin_user)]  # Глобальная защита для всех endpoints
+    dependencies=[Depends(get_admin_user)],  # Глобальная защита для всех endpoints
 )
 
 
@@ -55,13 +130,14 @@ router = APIRouter(
 )
 async def get_platform_stats(
     current_admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_ro),
 ) -> AdminStatsResponse:
     """
     Получение статистики платформы для админ панели.
 
     Требует JWT аутентификации с ролью admin.
-    Выполняет несколько агрегирующих запросов к БД для сбора метрик.
+    Все метрики собираются одним агрегирующим запросом к БД;
+    результат кэшируется на STATS_CACHE_TTL_SECONDS секунд.
 
     Args:
         current_admin: Текущий администратор (из JWT токена с проверкой роли)
@@ -77,59 +153,60 @@ async def get_platform_stats(
 
     # Логирование доступа к админ панели для audit trail
     logger.info(
-        f"Admin stats access: user_id={current_admin.id}, "
-        f"username={current_admin.username}, "
-        f"timestamp={datetime.utcnow().isoformat()}"
+        "Admin stats access: user_id=%s, username=%s",
+        current_admin.id,
+        current_admin.username,
     )
 
-    # === 1. Общее количество пользователей ===
-    total_users_query = select(func.count()).select_from(User)
-    total_users_result = await db.execute(total_users_query)
-    total_users = total_users_result.scalar() or 0
+    cached = _stats_cache.get("stats")
+    if cached is not None:
+        return cached
 
-    # === 2. Общее количество задач ===
-    total_tasks_query = select(func.count()).select_from(Task)
-    total_tasks_result = await db.execute(total_tasks_query)
-    total_tasks = total_tasks_result.scalar() or 0
+    # Начало сегодняшнего дня (UTC) для подсчёта активных пользователей
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # === 3. Общее количество попыток ===
-    total_attempts_query = select(func.count()).select_from(UserTaskAttempt)
-    total_attempts_result = await db.execute(total_attempts_query)
-    total_attempts = total_attempts_result.scalar() or 0
+    # Все метрики по попыткам — один проход по user_task_attempts
+    # (условная агрегация вместо трёх отдельных COUNT)
+    attempts = select(
+        func.count().label("total"),
+        func.count().filter(UserTaskAttempt.is_correct == True).label("correct"),
+        func.count(
+            func.distinct(
+                case(
+                    (UserTaskAttempt.created_at >= today_start, UserTaskAttempt.user_id),
+                    else_=None,
+                )
+            )
+        ).label("active"),
+    ).subquery()
+
+    # Все метрики одной строкой за один round-trip.
+    # Точность считается в БД: NULLIF защищает от деления на 0, COALESCE даёт 0.0
+    stats_query = select(
+        select(func.count()).select_from(User).scalar_subquery().label("total_users"),
+        select(func.count()).select_from(Task).scalar_subquery().label("total_tasks"),
+        attempts.c.total.label("total_attempts"),
+        attempts.c.correct.label("total_correct_attempts"),
+        cast(
+            func.round(
+                func.coalesce(
+                    cast(attempts.c.correct, Numeric) * 100
+                    / func.nullif(attempts.c.total, 0),
+                    0,
+                ),
+                2,
+            ),
+            Float,
+        ).label("platform_accuracy"),
+        attempts.c.active.label("active_users_today"),
+    ).select_from(attempts)
 
-    # === 4. Количество правильных попыток ===
-    correct_attempts_query = select(func.count()).select_from(UserTaskAttempt).where(
-        UserTaskAttempt.is_correct == True
-    )
-    correct_attempts_result = await db.execute(correct_attempts_query)
-    total_correct_attempts = correct_attempts_result.scalar() or 0
-
-    # === 5. Расчёт точности платформы ===
-    platform_accuracy = (
-        (total_correct_attempts / total_attempts * 100)
-        if total_attempts > 0
-        else 0.0
-    )
+    row = (await db.execute(stats_query)).one()
 
-    # === 6. Активные пользователи за сегодня ===
-    # Определяем начало сегодняшнего дня (UTC)
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    stats = AdminStatsResponse(**row._mapping)
+    _stats_cache["stats"] = stats
 
-    active_users_query = select(
-        func.count(func.distinct(UserTaskAttempt.user_id))
-    ).where(UserTaskAttempt.created_at >= today_start)
-    active_users_result = await db.execute(active_users_query)
-    active_users_today = active_users_result.scalar() or 0
-
-    # === 7. Формирование ответа ===
-    return AdminStatsResponse(
-        total_users=total_users,
-        total_tasks=total_tasks,
-        total_attempts=total_attempts,
-        total_correct_attempts=total_correct_attempts,
-        platform_accuracy=round(platform_accuracy, 2),  # Округление до 2 знаков
-        active_users_today=active_users_today,
-    )
+    return stats
 
 
 # ===================================
@@ -158,12 +235,13 @@ async def create_task(
 
     # Логирование ПЕРЕД операцией для audit trail
     logger.info(
-        f"Admin task creation: admin_id={current_admin.id}, "
-        f"admin_username={current_admin.username}, "
-        f"task_subject={task_data.subject}, "
-        f"task_topic={task_data.topic}, "
-        f"task_difficulty={task_data.difficulty}, "
-        f"timestamp={datetime.utcnow().isoformat()}"
+        "Admin task creation: admin_id=%s, admin_username=%s, "
+        "task_subject=%s, task_topic=%s, task_difficulty=%s",
+        current_admin.id,
+        current_admin.username,
+        task_data.subject,
+        task_data.topic,
+        task_data.difficulty,
     )
 
     # Создание новой задачи
@@ -183,21 +261,21 @@ async def create_task(
         await db.refresh(new_task)
 
         logger.info(
-            f"Task created successfully: task_id={new_task.id}, title={new_task.title}"
+            "Task created successfully: task_id=%s, title=%s", new_task.id, new_task.title
         )
 
         return new_task
 
     except IntegrityError as e:
         await db.rollback()
-        logger.error(f"Task creation failed with integrity error: {e}")
+        logger.error("Task creation failed with integrity error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Не удалось создать задачу. Возможно, дублирование данных.",
         )
     except Exception as e:
         await db.rollback()
-        logger.error(f"Unexpected error during task creation: {e}", exc_info=True)
+        logger.error("Unexpected error during task creation: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера",
@@ -220,8 +298,8 @@ async def get_admin_tasks(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(20, ge=1, le=100, description="Элементов на странице"),
     current_admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
-) -> AdminPaginatedTaskResponse:
+    db: AsyncSession = Depends(get_db_ro),
+) -> ORJSONResponse:
     """
     Получение списка задач для администратора с фильтрацией и пагинацией.
 
@@ -230,13 +308,17 @@ async def get_admin_tasks(
 
     # Логирование доступа
     logger.info(
-        f"Admin tasks list access: admin_id={current_admin.id}, "
-        f"filters=[subject={subject}, topic={topic}, difficulty={difficulty}], "
-        f"page={page}"
+        "Admin tasks list access: admin_id=%s, "
+        "filters=[subject=%s, topic=%s, difficulty=%s], page=%s",
+        current_admin.id,
+        subject,
+        topic,
+        difficulty,
+        page,
     )
 
-    # Базовый запрос
-    query = select(Task)
+    # Базовый запрос: только колонки ответа, строки валидируются без ORM-объектов
+    query = select(*ADMIN_TASK_COLUMNS)
 
     if subject is not None:
         query = query.where(Task.subject == subject)
@@ -245,26 +327,45 @@ async def get_admin_tasks(
     if difficulty is not None:
         query = query.where(Task.difficulty == difficulty)
 
-    # Подсчет total
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+    # Страница и total одним запросом: count() OVER () считается до LIMIT/OFFSET
+    offset = (page - 1) * per_page
+    page_query = (
+        query.add_columns(func.count().over().label("total"))
+        .order_by(Task.created_at.desc())
+        .offset(offset)
+        .limit(per_page)
+    )
+
+    result = await db.execute(page_query)
+    rows = result.mappings().all()
+
+    if rows:
+        total = rows[0]["total"]
+    elif offset > 0:
+        # Страница за пределами выборки - total узнаем отдельным запросом
+        count_query = select(func.count()).select_from(query.subquery())
+        total = (await db.execute(count_query)).scalar() or 0
+    else:
+        total = 0
 
-    # Пагинация
     pages = ceil(total / per_page) if total > 0 else 0
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page).order_by(Task.created_at.desc())
 
-    result = await db.execute(query)
-    tasks = result.scalars().all()
+    # Строки из БД уже соответствуют TaskAdminResponse - отдаём их напрямую через
+    # orjson, без повторной Pydantic-валидации каждой задачи (response_model
+    # остаётся для документации OpenAPI)
+    items = []
+    for row in rows:
+        item = dict(row)
+        del item["total"]
+        items.append(item)
 
-    return AdminPaginatedTaskResponse(
-        items=[TaskAdminResponse.model_validate(task) for task in tasks],
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=pages,
-    )
+    return ORJSONResponse({
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": pages,
+    })
 
 
 # ===================================
@@ -272,20 +373,129 @@ async def get_admin_tasks(
 # ===================================
 
 
+def _parse_import_file(raw: BinaryIO, is_json: bool) -> list[dict]:
+    """
+    Разбор файла импорта в список словарей задач (без валидации).
+
+    Raises:
+        orjson.JSONDecodeError: Некорректный JSON
+        ValueError: JSON не является массивом
+    """
+    if is_json:
+        # Парсинг JSON: orjson разбирает байты напрямую, без промежуточной str
+        data = orjson.loads(raw.read())
+        if not isinstance(data, list):
+            raise ValueError("JSON должен содержать массив объектов задач")
+        return data
+
+    # Читаем CSV потоково: байты декодируются кусками, целиком в память не копируются
+    text_stream = TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        tasks_data = []
+        for row in csv.DictReader(text_stream):
+            # Обязательные колонки одним вызовом itemgetter (KeyError, если колонки нет)
+            task = dict(zip(IMPORT_CSV_FIELDS, _get_import_csv_fields(row)))
+
+            # Обработка hints (разделённые точкой с запятой)
+            hints_str = row.get("hints")
+            task["hints"] = [h.strip() for h in hints_str.split(";") if h.strip()] if hints_str else []
+
+            tasks_data.append(task)
+        return tasks_data
+    finally:
+        # Отсоединяем обёртку, чтобы она не закрыла исходный файл при сборке мусора
+        text_stream.detach()
+
+
+def _validate_import(tasks_data: list) -> tuple[list[dict], list[str]]:
+    """
+    Валидация всего списка задач одним проходом TypeAdapter.
+
+    Returns:
+        (значения для INSERT, ошибки вида "Строка N: ...")
+    """
+    try:
+        validated_tasks = _TASKS_ADAPTER.validate_python(tasks_data)
+    except ValidationError as e:
+        # loc начинается с индекса элемента списка
+        errors = []
+        for error in e.errors():
+            idx = error["loc"][0] if error["loc"] else 0
+            errors.append(f"Строка {idx + 1}: {error['msg']}")
+        logger.warning("Failed to import tasks: %s validation errors", e.error_count())
+        return [], errors
+
+    return [task.model_dump() for task in validated_tasks], []
+
+
+async def _run_import_job(job_id: int, content: bytes, is_json: bool) -> None:
+    """
+    Фоновая обработка импорта: разбор, валидация и вставка в собственной сессии.
+
+    Запускается через BackgroundTasks после отправки ответа 202. Итог
+    (done/failed) записывается в ImportJob.
+    """
+    async with async_session_maker() as session:
+        try:
+            # Отметка о начале - внутри try: если она не запишется, задание
+            # всё равно завершится статусом failed, а не останется pending
+            await session.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(status=ImportJobStatus.RUNNING.value)
+            )
+            await session.commit()
+
+            # Разбор и валидация синхронные - выполняем в пуле потоков
+            tasks_data = await run_in_threadpool(_parse_import_file, BytesIO(content), is_json)
+            task_values, errors = await run_in_threadpool(_validate_import, tasks_data)
+
+            if errors:
+                job_values = {
+                    "status": ImportJobStatus.FAILED.value,
+                    "total": len(tasks_data),
+                    "created": 0,
+                    "error": f"{len(errors)} ошибок валидации. Первая ошибка: {errors[0]}",
+                }
+            else:
+                if task_values:
+                    await session.execute(insert(Task), task_values)
+                job_values = {
+                    "status": ImportJobStatus.DONE.value,
+                    "total": len(tasks_data),
+                    "created": len(task_values),
+                }
+
+        except Exception as e:
+            await session.rollback()
+            logger.error("Import job %s failed: %s", job_id, e, exc_info=True)
+            job_values = {"status": ImportJobStatus.FAILED.value, "error": str(e)}
+
+        await session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**job_values))
+        await session.commit()
+
+        logger.info("Import job %s finished: %s", job_id, job_values)
+
+
 @router.post(
     "/tasks/import",
+    # Ответ - dict (200) или ORJSONResponse (202): модель ответа не выводится из аннотации
+    response_model=None,
     summary="Импорт задач из CSV/JSON",
     description=(
         "Массовая загрузка задач из CSV или JSON файла. "
         "Требует роль администратора. "
-        "Поддерживает форматы: application/json, text/csv"
+        "Поддерживает форматы: application/json, text/csv. "
+        "Файлы больше 100KB обрабатываются в фоне: возвращается 202 с job_id, "
+        "статус доступен по /api/admin/imports/{job_id}"
     ),
 )
 async def import_tasks(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_admin: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
-) -> dict:
+) -> dict | ORJSONResponse:
     """
     Импорт задач из CSV или JSON файла.
 
@@ -311,94 +521,62 @@ async def import_tasks(
     """
 
     logger.info(
-        f"Admin tasks import: admin_id={current_admin.id}, "
-        f"filename={file.filename}, "
-        f"content_type={file.content_type}"
+        "Admin tasks import: admin_id=%s, filename=%s, content_type=%s",
+        current_admin.id,
+        file.filename,
+        file.content_type,
     )
 
-    content = await file.read()
-
-    # Проверка размера файла
-    if len(content) > MAX_IMPORT_FILE_SIZE:
+    # Проверка размера файла (UploadFile уже сохранён в SpooledTemporaryFile)
+    if file.size is not None and file.size > MAX_IMPORT_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"Файл слишком большой. Максимальный размер: {MAX_IMPORT_FILE_SIZE / 1024 / 1024:.0f}MB"
         )
 
-    content_str = content.decode("utf-8")
-
-    tasks_data = []
+    # Определяем формат по content_type или расширению
+    is_json = (
+        file.content_type == "application/json"
+        or (file.filename and file.filename.endswith(".json"))
+    )
+    is_csv = (
+        file.content_type in ["text/csv", "application/csv"]
+        or (file.filename and file.filename.endswith(".csv"))
+    )
 
-    try:
-        # Определяем формат по content_type или расширению
-        is_json = (
-            file.content_type == "application/json"
-            or (file.filename and file.filename.endswith(".json"))
-        )
-        is_csv = (
-            file.content_type in ["text/csv", "application/csv"]
-            or (file.filename and file.filename.endswith(".csv"))
+    if not is_json and not is_csv:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неподдерживаемый формат файла. Используйте JSON или CSV.",
         )
 
-        if is_json:
-            # Парсинг JSON
-            data = json.loads(content_str)
-            if not isinstance(data, list):
-                raise ValueError("JSON должен содержать массив объектов задач")
-            tasks_data = data
-
-        elif is_csv:
-            # Парсинг CSV
-            csv_file = StringIO(content_str)
-            reader = csv.DictReader(csv_file)
-
-            for row in reader:
-                # Обработка hints (разделённые точкой с запятой)
-                hints_str = row.get("hints", "")
-                hints = [h.strip() for h in hints_str.split(";") if h.strip()] if hints_str else []
-
-                task_dict = {
-                    "subject": row["subject"],
-                    "topic": row["topic"],
-                    "difficulty": int(row["difficulty"]),
-                    "title": row["title"],
-                    "text": row["text"],
-                    "answer": row["answer"],
-                    "hints": hints,
-                }
-                tasks_data.append(task_dict)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Неподдерживаемый формат файла. Используйте JSON или CSV.",
-            )
+    # Большой файл - обрабатываем в фоне, запрос сразу возвращает 202
+    if file.size is not None and file.size > IMPORT_BACKGROUND_THRESHOLD:
+        # Содержимое читаем сейчас: после ответа UploadFile будет закрыт
+        content = await file.read()
 
-        # Валидация и создание задач
-        created_count = 0
-        errors = []
+        job = ImportJob(admin_id=current_admin.id, filename=file.filename)
+        db.add(job)
+        await db.commit()
 
-        for idx, task_data in enumerate(tasks_data):
-            try:
-                # Валидация через Pydantic схему
-                validated_task = TaskCreate(**task_data)
-
-                # Создание задачи
-                new_task = Task(
-                    subject=validated_task.subject,
-                    topic=validated_task.topic,
-                    difficulty=validated_task.difficulty,
-                    title=validated_task.title,
-                    text=validated_task.text,
-                    answer=validated_task.answer,
-                    hints=validated_task.hints,
-                )
+        background_tasks.add_task(_run_import_job, job.id, content, bool(is_json))
+
+        logger.info("Tasks import queued: job_id=%s, size=%s", job.id, file.size)
+
+        return ORJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "ok": True,
+                "job_id": job.id,
+                "status": job.status,
+            },
+        )
 
-                db.add(new_task)
-                created_count += 1
+    try:
+        tasks_data = _parse_import_file(file.file, bool(is_json))
 
-            except Exception as e:
-                errors.append(f"Строка {idx + 1}: {str(e)}")
-                logger.warning(f"Failed to import task at index {idx}: {e}")
+        # Валидируем весь список одним проходом, затем вставляем одним executemany
+        task_values, errors = _validate_import(tasks_data)
 
         # Проверить наличие ошибок ПЕРЕД коммитом
         if errors:
@@ -411,11 +589,16 @@ async def import_tasks(
                 detail=f"Импорт провален: {len(errors)} ошибок валидации. Первая ошибка: {errors[0]}"
             )
 
-        # Коммит только если НЕТ ошибок
+        # Вставка и коммит только если НЕТ ошибок
+        if task_values:
+            await db.execute(insert(Task), task_values)
         await db.commit()
+        created_count = len(task_values)
 
         logger.info(
-            f"Tasks import completed successfully: created={created_count}, total={len(tasks_data)}"
+            "Tasks import completed successfully: created=%s, total=%s",
+            created_count,
+            len(tasks_data),
         )
 
         return {
@@ -425,21 +608,51 @@ async def import_tasks(
             "errors": None,
         }
 
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parse error: {e}")
+    except HTTPException:
+        raise
+    except orjson.JSONDecodeError as e:
+        logger.error("JSON parse error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Ошибка парсинга JSON: {str(e)}",
         )
     except Exception as e:
         await db.rollback()
-        logger.error(f"Unexpected error during import: {e}", exc_info=True)
+        logger.error("Unexpected error during import: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка импорта: {str(e)}",
         )
 
 
+@router.get(
+    "/imports/{job_id}",
+    response_model=ImportJobResponse,
+    summary="Статус фонового импорта задач",
+    description="Возвращает статус импорта, запущенного для большого файла.",
+)
+async def get_import_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+) -> ImportJob:
+    """
+    Статус фонового импорта по job_id.
+
+    Читается из основной БД, а не с реплики: задание создаётся прямо перед
+    ответом 202, и отставание реплики давало бы 404 для только что созданного.
+    """
+
+    job = await db.get(ImportJob, job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Импорт с ID {job_id} не найден",
+        )
+
+    return job
+
+
 @router.get(
     "/tasks/export",
     summary="Экспорт задач в CSV/JSON",
@@ -453,7 +666,6 @@ async def export_tasks(
     request: Request,
     format: str = Query("json", pattern="^(json|csv)$", description="Формат экспорта: json или csv"),
     current_admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
 ) -> StreamingResponse:
     """
     Экспорт всех задач в JSON или CSV формате.
@@ -462,81 +674,77 @@ async def export_tasks(
     """
 
     logger.info(
-        f"Admin tasks export: admin_id={current_admin.id}, format={format}"
+        "Admin tasks export: admin_id=%s, format=%s", current_admin.id, format
     )
 
     # Получить origin из request для CORS (fallback на localhost для локальной разработки)
     origin = request.headers.get("origin", "http://localhost:3000")
 
-    # Получить все задачи
-    query = select(Task).order_by(Task.created_at.desc())
-    result = await db.execute(query)
-    tasks = result.scalars().all()
+    # Строки читаются в момент отдачи ответа, а не во время обработки запроса
+    tasks = _iter_export_rows()
 
-    if format == "json":
-        # JSON экспорт
-        tasks_data = [
-            {
-                "id": task.id,
-                "subject": task.subject,
-                "topic": task.topic,
-                "difficulty": task.difficulty,
-                "title": task.title,
-                "text": task.text,
-                "answer": task.answer,
-                "hints": task.hints,
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-            }
-            for task in tasks
-        ]
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    headers = {
+        "Content-Disposition": f"attachment; filename=tasks_export_{timestamp}.{format}",
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Credentials": "true",
+        "Access-Control-Expose-Headers": "Content-Disposition",
+    }
 
-        json_content = json.dumps(tasks_data, ensure_ascii=False, indent=2)
+    if format == "json":
+        # JSON экспорт: массив собирается по одному объекту на задачу
+        async def json_stream() -> AsyncIterator[bytes]:
+            yield b"["
+            first = True
+            async for task in tasks:
+                chunk = orjson.dumps(_task_export_dict(task))
+                yield chunk if first else b"," + chunk
+                first = False
+            yield b"]"
 
         return StreamingResponse(
-            iter([json_content]),
+            json_stream(),
             media_type="application/json; charset=utf-8",
-            headers={
-                "Content-Disposition": f"attachment; filename=tasks_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Credentials": "true",
-                "Access-Control-Expose-Headers": "Content-Disposition",
-            },
+            headers=headers,
         )
 
     else:  # format == "csv"
-        # CSV экспорт
-        output = StringIO()
-        fieldnames = ["id", "subject", "topic", "difficulty", "title", "text", "answer", "hints", "created_at"]
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for task in tasks:
-            # Hints в CSV соединяем точкой с запятой
-            hints_str = ";".join(task.hints) if task.hints else ""
-
-            writer.writerow({
-                "id": task.id,
-                "subject": task.subject,
-                "topic": task.topic,
-                "difficulty": task.difficulty,
-                "title": task.title,
-                "text": task.text,
-                "answer": task.answer,
-                "hints": hints_str,
-                "created_at": task.created_at.isoformat() if task.created_at else "",
-            })
-
-        csv_content = output.getvalue()
+        # CSV экспорт: один буфер на весь ответ, после каждой строки очищается
+        async def csv_stream() -> AsyncIterator[str]:
+            buffer = StringIO()
+            writer = csv.writer(buffer)
+
+            def flush() -> str:
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                return chunk
+
+            writer.writerow(EXPORT_FIELDNAMES)
+            yield flush()
+
+            # Строки пишутся кортежами в порядке EXPORT_FIELDNAMES (без dict на строку)
+            async for task in tasks:
+                hints = task["hints"]
+                created_at = task["created_at"]
+                writer.writerow((
+                    task["id"],
+                    task["subject"],
+                    task["topic"],
+                    task["difficulty"],
+                    task["title"],
+                    task["text"],
+                    task["answer"],
+                    # Hints в CSV соединяем точкой с запятой
+                    ";".join(hints) if hints else "",
+                    created_at.isoformat() if created_at else "",
+                ))
+                yield flush()
 
         return StreamingResponse(
-            iter([csv_content]),
+            csv_stream(),
             media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": f"attachment; filename=tasks_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv",
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Credentials": "true",
-                "Access-Control-Expose-Headers": "Content-Disposition",
-            },
+            headers=headers,
         )
 
 
@@ -549,11 +757,11 @@ async def export_tasks(
 async def get_admin_task(
     task_id: int,
     current_admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_ro),
 ) -> Task:
     """Получение детальной информации о задаче для администратора."""
 
-    logger.info(f"Admin task view: admin_id={current_admin.id}, task_id={task_id}")
+    logger.info("Admin task view: admin_id=%s, task_id=%s", current_admin.id, task_id)
 
     # Используем session.get() - самый эффективный способ для PK lookup
     task = await db.get(Task, task_id)
@@ -587,45 +795,54 @@ async def update_task(
     - Используется exclude_unset=True для игнорирования None значений
     """
 
-    # Получение существующей задачи
-    task = await db.get(Task, task_id)
-
-    if task is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Задача с ID {task_id} не найдена",
-        )
-
     # Логирование ПЕРЕД изменениями
     update_data = task_data.model_dump(exclude_unset=True)
     logger.info(
-        f"Admin task update: admin_id={current_admin.id}, "
-        f"task_id={task_id}, "
-        f"updates={update_data}"
+        "Admin task update: admin_id=%s, task_id=%s, updates=%s",
+        current_admin.id,
+        task_id,
+        update_data,
     )
 
-    # Применение обновлений (только переданные поля)
-    for field, value in update_data.items():
-        setattr(task, field, value)
-
     try:
+        if update_data:
+            # UPDATE ... RETURNING: изменение и чтение результата одним запросом
+            # (только переданные поля)
+            result = await db.execute(
+                update(Task)
+                .where(Task.id == task_id)
+                .values(**update_data)
+                .returning(Task)
+            )
+            task = result.scalar_one_or_none()
+        else:
+            # Нечего обновлять - просто возвращаем задачу
+            task = await db.get(Task, task_id)
+
+        if task is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Задача с ID {task_id} не найдена",
+            )
+
         await db.commit()
-        await db.refresh(task)
 
-        logger.info(f"Task updated successfully: task_id={task_id}")
+        logger.info("Task updated successfully: task_id=%s", task_id)
 
         return task
 
+    except HTTPException:
+        raise
     except IntegrityError as e:
         await db.rollback()
-        logger.error(f"Task update failed with integrity error: {e}")
+        logger.error("Task update failed with integrity error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Не удалось обновить задачу. Проверьте корректность данных.",
         )
     except Exception as e:
         await db.rollback()
-        logger.error(f"Unexpected error during task update: {e}", exc_info=True)
+        logger.error("Unexpected error during task update: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера",
@@ -650,35 +867,76 @@ async def delete_task(
     Для production рекомендуется использовать soft delete.
     """
 
-    # Получение задачи
-    task = await db.get(Task, task_id)
+    # Строка задачи блокируется (FOR UPDATE) до commit: новые попытки по ней
+    # ждут блокировки на проверке внешнего ключа, поэтому набор попыток не
+    # меняется между пересчётом счётчиков и удалением.
+    # title/subject для audit trail берём из этого же запроса
+    lock_stmt = (
+        select(Task.title, Task.subject)
+        .where(Task.id == task_id)
+        .with_for_update()
+    )
 
-    if task is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Задача с ID {task_id} не найдена",
+    # Попытки по задаче удаляются каскадом (ondelete="CASCADE"), поэтому
+    # счётчики пользователей (User.total_attempts и др.) уменьшаются заранее,
+    # одним UPDATE ... FROM по агрегату попыток этой задачи
+    task_attempts = (
+        select(
+            UserTaskAttempt.user_id,
+            func.count(UserTaskAttempt.id).label("total"),
+            func.count(case((UserTaskAttempt.is_correct == True, 1))).label("correct"),
         )
-
-    # Логирование ПЕРЕД удалением (warning уровень для критических операций)
-    logger.warning(
-        f"Admin task deletion: admin_id={current_admin.id}, "
-        f"task_id={task_id}, "
-        f"task_title={task.title}, "
-        f"task_subject={task.subject}, "
-        f"timestamp={datetime.utcnow().isoformat()}"
+        .where(UserTaskAttempt.task_id == task_id)
+        .group_by(UserTaskAttempt.user_id)
+        .subquery()
+    )
+    counters_stmt = (
+        update(User)
+        .where(User.id == task_attempts.c.user_id)
+        .values(
+            total_attempts=User.total_attempts - task_attempts.c.total,
+            correct_attempts=User.correct_attempts - task_attempts.c.correct,
+            unique_solved=User.unique_solved - case(
+                (task_attempts.c.correct > 0, 1), else_=0
+            ),
+        )
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
     )
 
     try:
-        await db.delete(task)
+        row = (await db.execute(lock_stmt)).first()
+
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Задача с ID {task_id} не найдена",
+            )
+
+        affected_user_ids = (await db.execute(counters_stmt)).scalars().all()
+        await db.execute(delete(Task).where(Task.id == task_id))
+
+        # Логирование удаления (warning уровень для критических операций)
+        logger.warning(
+            "Admin task deletion: admin_id=%s, task_id=%s, task_title=%s, task_subject=%s",
+            current_admin.id,
+            task_id,
+            row.title,
+            row.subject,
+        )
+
         await db.commit()
+        invalidate_user_stats(*affected_user_ids)
 
-        logger.info(f"Task deleted successfully: task_id={task_id}")
+        logger.info("Task deleted successfully: task_id=%s", task_id)
 
         return {"ok": True, "message": f"Задача {task_id} успешно удалена"}
 
+    except HTTPException:
+        raise
     except IntegrityError as e:
         await db.rollback()
-        logger.error(f"Task deletion failed with integrity error: {e}")
+        logger.error("Task deletion failed with integrity error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
@@ -688,7 +946,7 @@ async def delete_task(
         )
     except Exception as e:
         await db.rollback()
-        logger.error(f"Unexpected error during task deletion: {e}", exc_info=True)
+        logger.error("Unexpected error during task deletion: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера",
@@ -732,8 +990,10 @@ async def generate_task_variations(
     """
 
     logger.info(
-        f"Admin task variations generation: admin_id={current_admin.id}, "
-        f"task_id={task_id}, count={count}"
+        "Admin task variations generation: admin_id=%s, task_id=%s, count=%s",
+        current_admin.id,
+        task_id,
+        count,
     )
 
     # Получить исходную задачу
@@ -768,49 +1028,51 @@ async def generate_task_variations(
             )
 
         # Генерация вариаций
-        variations = TaskGenerator.generate_multiple(template, count=count)
-
-        # Сохранение вариаций в БД
-        created_tasks = []
-        for idx, variation in enumerate(variations):
-            new_task = Task(
-                subject=variation["subject"],
-                topic=variation["topic"],
-                difficulty=variation["difficulty"],
-                title=f"{variation['title']} (вариация {idx + 1})",
-                text=variation["text"],
-                answer=variation["answer"],
-                hints=variation["hints"],
-            )
-            db.add(new_task)
-            created_tasks.append(new_task)
+        # Генерация (regex + eval) синхронная - выполняем в пуле потоков,
+        # чтобы не блокировать event loop для остальных запросов
+        variations = await run_in_threadpool(
+            TaskGenerator.generate_multiple, template, count=count
+        )
 
-        await db.commit()
+        # Сохранение вариаций в БД одним INSERT ... RETURNING id
+        task_values = [
+            {
+                "subject": variation["subject"],
+                "topic": variation["topic"],
+                "difficulty": variation["difficulty"],
+                "title": f"{variation['title']} (вариация {idx + 1})",
+                "text": variation["text"],
+                "answer": variation["answer"],
+                "hints": variation["hints"],
+            }
+            for idx, variation in enumerate(variations)
+        ]
+        result = await db.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            task_values,
+        )
+        task_ids = list(result)
 
-        # Обновить created_tasks с ID
-        for task in created_tasks:
-            await db.refresh(task)
+        await db.commit()
 
-        logger.info(
-            f"Generated {len(created_tasks)} variations for task {task_id}"
-        )
+        logger.info("Generated %s variations for task %s", len(task_ids), task_id)
 
         return {
             "ok": True,
-            "count": len(created_tasks),
-            "task_ids": [t.id for t in created_tasks],
-            "message": f"Создано {len(created_tasks)} вариаций задачи",
+            "count": len(task_ids),
+            "task_ids": task_ids,
+            "message": f"Создано {len(task_ids)} вариаций задачи",
         }
 
     except ValueError as e:
-        logger.error(f"Template validation failed: {e}")
+        logger.error("Template validation failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
     except Exception as e:
         await db.rollback()
-        logger.error(f"Unexpected error during generation: {e}", exc_info=True)
+        logger.error("Unexpected error during generation: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка генерации: {str(e)}",
@@ -1,18 +1,61 @@
 import logging
+import secrets
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import User
 from app.schemas.user import UserCreate, UserResponse, LoginRequest, TokenResponse
-from app.utils.auth import hash_password, verify_password, create_access_token
+from app.utils.auth import hash_password, hash_password_async, verify_password_async, create_access_token
 from app.dependencies.auth import get_current_user
 
 logger = logging.getLogger(__name__)
 
 
+# Сообщения об ошибке по имени нарушенного UNIQUE constraint таблицы users
+# (имена по умолчанию PostgreSQL: <table>_<column>_key)
+USER_UNIQUE_VIOLATION_MESSAGES = {
+    "users_email_key": "Пользователь с таким email уже существует",
+    "users_username_key": "Это имя пользователя уже занято",
+}
+
+
+def _unique_violation_detail(error: IntegrityError) -> str:
+    """Текст ошибки регистрации по constraint, который нарушил INSERT."""
+    # asyncpg-исключение (с constraint_name) лежит в __cause__ DBAPI-обёртки
+    constraint_name = getattr(error.orig.__cause__, "constraint_name", None)
+    return USER_UNIQUE_VIOLATION_MESSAGES.get(
+        constraint_name,
+        "Пользователь с таким email или username уже существует",
+    )
+
+
+# Фиктивный bcrypt-хеш (та же стоимость, что у настоящих) для проверки пароля
+# при неизвестном email; пароль случайный и нигде не сохраняется
+DUMMY_PASSWORD_HASH = hash_password(secrets.token_urlsafe(32))
+
+
+def _user_payload(user: User) -> dict:
+    """
+    Поля UserResponse из объекта User.
+
+    Данные пользователя берутся из нашей БД, повторная валидация через
+    Pydantic на каждом запросе не нужна - ответ сериализуется сразу orjson.
+    response_model у endpoint'ов остаётся для документации OpenAPI.
+    """
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "rating": user.rating,
+        "role": user.role,
+        "created_at": user.created_at,
+    }
+
+
 # API роутер для аутентификации и регистрации
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -43,46 +86,33 @@ async def register_user(
         HTTPException 422: Если данные не прошли валидацию (автоматически от Pydantic)
     """
 
-    # Проверка уникальности email
-    email_query = select(User).where(User.email == user_data.email)
-    existing_email = await db.execute(email_query)
-    if existing_email.scalar_one_or_none() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Пользователь с таким email уже существует"
+    # Хеширование пароля (в пуле потоков, не блокирует event loop)
+    hashed_password = await hash_password_async(user_data.password)
+
+    # Создание нового пользователя одним INSERT ... RETURNING.
+    # Уникальность email и username проверяет сама БД (UNIQUE constraints) -
+    # без предварительных SELECT на каждой регистрации
+    insert_query = (
+        insert(User)
+        .values(
+            username=user_data.username,
+            email=user_data.email,
+            hashed_password=hashed_password,
+            rating=1000,  # Стартовый рейтинг
+            role="user",  # Роль по умолчанию
         )
-
-    # Проверка уникальности username
-    username_query = select(User).where(User.username == user_data.username)
-    existing_username = await db.execute(username_query)
-    if existing_username.scalar_one_or_none() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Это имя пользователя уже занято"
-        )
-
-    # Хеширование пароля
-    hashed_password = hash_password(user_data.password)
-
-    # Создание нового пользователя
-    new_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password,
-        rating=1000,  # Стартовый рейтинг
-        role="user"   # Роль по умолчанию
+        .returning(User)
     )
 
     # Сохранение в БД
     try:
-        db.add(new_user)
+        new_user = (await db.execute(insert_query)).scalar_one()
         await db.commit()
-        await db.refresh(new_user)
-    except IntegrityError:
+    except IntegrityError as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Пользователь с таким email или username уже существует"
+            detail=_unique_violation_detail(e),
         )
 
     return new_user
@@ -97,7 +127,7 @@ async def register_user(
 async def login(
     login_data: LoginRequest,
     db: AsyncSession = Depends(get_db)
-) -> TokenResponse:
+) -> ORJSONResponse:
     """
     Аутентификация пользователя и получение JWT токена.
 
@@ -125,19 +155,16 @@ async def login(
     logger.info(f"User found: {user is not None}")
 
     # КРИТИЧНО: Одинаковое сообщение для обоих случаев (защита от username enumeration)
-    # НЕ раскрываем, существует ли пользователь с таким email или просто пароль неверный
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Неверный email или пароль",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # НЕ раскрываем, существует ли пользователь с таким email или просто пароль неверный.
+    # bcrypt выполняется ВСЕГДА (для неизвестного email - по фиктивному хешу),
+    # чтобы время ответа тоже не выдавало существование пользователя
+    hashed_password = user.hashed_password if user is not None else DUMMY_PASSWORD_HASH
+    password_ok = await verify_password_async(login_data.password, hashed_password)
 
-    # Проверяем пароль с помощью bcrypt (constant-time comparison)
-    if not verify_password(login_data.password, user.hashed_password):
+    if user is None or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Неверный email или пароль",  # То же самое сообщение!
+            detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
@@ -151,10 +178,8 @@ async def login(
         }
     )
 
-    logger.info(f"Returning TokenResponse")
-    response = TokenResponse(access_token=access_token, token_type="bearer")
-    logger.info(f"TokenResponse created: {type(response)}")
-    return response
+    # Две строки, сформированные сервером - отдаём без модели TokenResponse
+    return ORJSONResponse({"access_token": access_token, "token_type": "bearer"})
 
 
 @router.get(
@@ -165,7 +190,7 @@ async def login(
 )
 async def get_me(
     current_user: User = Depends(get_current_user)
-) -> User:
+) -> ORJSONResponse:
     """
     Получение данных текущего авторизованного пользователя.
 
@@ -186,5 +211,5 @@ async def get_me(
         и ввода токена, полученного от /login.
     """
     # get_current_user уже извлёк пользователя из БД на основе токена
-    # Просто возвращаем его (FastAPI автоматически сериализует через UserResponse)
-    return current_user
+    # Отдаём его поля напрямую, без повторной валидации через UserResponse
+    return ORJSONResponse(_user_payload(current_user))
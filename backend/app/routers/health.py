@@ -1,17 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
 
 # API роутер для health check
 router = APIRouter(prefix="/api", tags=["health"])
 
+# Готовое тело ответа health check (сериализуется один раз при импорте)
+HEALTH_RESPONSE_BODY = b'{"status":"ok"}'
+
 
 # Простой health check endpoint
 @router.get("/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> Response:
     """
     Проверка здоровья приложения (health check).
 
+    Вызывается проверками liveness каждые несколько секунд, поэтому
+    отдаёт заранее подготовленные байты без JSON-сериализации.
+
     Returns:
-        Словарь с статусом приложения
+        JSON {"status": "ok"}
     """
-    return {"status": "ok"}
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json")
@@ -8,15 +8,16 @@ Endpoints:
 - POST /matches/{id}/answers - отправить ответ на задачу
 - POST /matches/{id}/finish - завершить матч
 """
-from datetime import datetime
-from typing import List, Optional
+from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import case, func, insert, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, noload, selectinload
 
-from app.database import get_db
+from app.database import get_db, get_db_ro
 from app.models import Match, MatchTask, MatchAnswer, User, Task, MatchStatus
 
 router = APIRouter(prefix="/matches", tags=["matches"])
@@ -63,21 +64,20 @@ async def create_match(
     """
     player1_id = match_data.player1_id
     player2_id = match_data.player2_id
-    # Проверяем что игроки существуют
-    result1 = await session.execute(select(User).where(User.id == player1_id))
-    user1 = result1.scalar_one_or_none()
-    if not user1:
-        raise HTTPException(status_code=404, detail=f"Игрок {player1_id} не найден")
-
-    result2 = await session.execute(select(User).where(User.id == player2_id))
-    user2 = result2.scalar_one_or_none()
-    if not user2:
-        raise HTTPException(status_code=404, detail=f"Игрок {player2_id} не найден")
-
-    # Проверяем что это разные игроки
+    # Проверяем что это разные игроки (до обращения к БД)
     if player1_id == player2_id:
         raise HTTPException(status_code=400, detail="Нельзя играть с собой")
 
+    # Проверяем что игроки существуют: один запрос, только id
+    existing_ids = set(
+        await session.scalars(
+            select(User.id).where(User.id.in_((player1_id, player2_id)))
+        )
+    )
+    for player_id in (player1_id, player2_id):
+        if player_id not in existing_ids:
+            raise HTTPException(status_code=404, detail=f"Игрок {player_id} не найден")
+
     # Создаём матч
     match = Match(
         player1_id=player1_id,
@@ -103,7 +103,7 @@ async def create_match(
 @router.get("/{match_id}", summary="Получить информацию о матче")
 async def get_match(
     match_id: int,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_db_ro),
 ):
     """
     Получить полную информацию о матче.
@@ -114,24 +114,34 @@ async def get_match(
     - Ответы игроков
     - Статус матча
     """
+    # Игроки, задачи (вместе с Task) и ответы загружаются вместе с матчем -
+    # фиксированное число запросов вне зависимости от количества задач
     result = await session.execute(
-        select(Match).where(Match.id == match_id)
+        select(Match)
+        .where(Match.id == match_id)
+        .options(
+            joinedload(Match.player1),
+            joinedload(Match.player2),
+            noload(Match.winner),
+            # Обратные ссылки и игроки ответов не нужны: без noload модельные
+            # lazy="joined" снова джойнили бы matches/users/tasks к каждой строке
+            selectinload(Match.tasks).options(
+                joinedload(MatchTask.task),
+                noload(MatchTask.match),
+            ),
+            selectinload(Match.answers).options(
+                noload(MatchAnswer.match),
+                noload(MatchAnswer.user),
+                noload(MatchAnswer.task),
+            ),
+        )
     )
     match = result.scalar_one_or_none()
     if not match:
         raise HTTPException(status_code=404, detail="Матч не найден")
 
-    # Получаем задачи
-    tasks_result = await session.execute(
-        select(MatchTask).where(MatchTask.match_id == match_id)
-    )
-    tasks = tasks_result.scalars().all()
-
-    # Получаем ответы
-    answers_result = await session.execute(
-        select(MatchAnswer).where(MatchAnswer.match_id == match_id)
-    )
-    answers = answers_result.scalars().all()
+    tasks = match.tasks  # уже по task_order (order_by у Match.tasks)
+    answers = match.answers
 
     return {
         "match": {
@@ -149,8 +159,8 @@ async def get_match(
                 "score": match.player2_score,
             },
             "status": match.status.value,
-            "created_at": match.created_at.isoformat(),
-            "finished_at": match.finished_at.isoformat() if match.finished_at else None,
+            "created_at": match.created_at,
+            "finished_at": match.finished_at,
         },
         "tasks": [
             {
@@ -166,7 +176,7 @@ async def get_match(
                 "user_id": a.user_id,
                 "task_id": a.task_id,
                 "is_correct": a.is_correct,
-                "submitted_at": a.submitted_at.isoformat(),
+                "submitted_at": a.submitted_at,
             }
             for a in answers
         ],
@@ -191,30 +201,27 @@ async def add_tasks_to_match(
     - Одна задача не может быть добавлена дважды
     """
     # Проверяем что матч существует
-    match_result = await session.execute(
-        select(Match).where(Match.id == match_id)
-    )
-    match = match_result.scalar_one_or_none()
-    if not match:
+    match_exists = await session.scalar(select(Match.id).where(Match.id == match_id))
+    if match_exists is None:
         raise HTTPException(status_code=404, detail="Матч не найден")
 
-    # Проверяем существование задач
-    tasks_result = await session.execute(
-        select(Task).where(Task.id.in_(tasks_data.task_ids))
+    # Проверяем существование задач (только количество, без загрузки строк Task)
+    found_count = await session.scalar(
+        select(func.count()).select_from(Task).where(Task.id.in_(tasks_data.task_ids))
     )
-    tasks = tasks_result.scalars().all()
 
-    if len(tasks) != len(tasks_data.task_ids):
+    if found_count != len(tasks_data.task_ids):
         raise HTTPException(status_code=404, detail="Некоторые задачи не найдены")
 
-    # Добавляем задачи в матч
-    for order, task_id in enumerate(tasks_data.task_ids, start=1):
-        match_task = MatchTask(
-            match_id=match_id,
-            task_id=task_id,
-            task_order=order,
+    # Добавляем задачи в матч одним executemany INSERT
+    if tasks_data.task_ids:
+        await session.execute(
+            insert(MatchTask),
+            [
+                {"match_id": match_id, "task_id": task_id, "task_order": order}
+                for order, task_id in enumerate(tasks_data.task_ids, start=1)
+            ],
         )
-        session.add(match_task)
 
     await session.commit()
 
@@ -236,7 +243,7 @@ async def submit_answer(
     """
     Отправить ответ на задачу в матче.
 
-    **UPSERT паттерн:**
+    **UPSERT паттерн (INSERT ... ON CONFLICT DO UPDATE):**
     - Если ответ уже существует → UPDATE
     - Если нет → INSERT
 
@@ -255,76 +262,74 @@ async def submit_answer(
     answer = answer_data.answer
 
     # Проверяем что матч существует
-    match_result = await session.execute(
-        select(Match).where(Match.id == match_id)
-    )
-    match = match_result.scalar_one_or_none()
-    if not match:
+    match_exists = await session.scalar(select(Match.id).where(Match.id == match_id))
+    if match_exists is None:
         raise HTTPException(status_code=404, detail="Матч не найден")
 
-    # Проверяем что задача в матче
-    task_result = await session.execute(
-        select(MatchTask).where(
+    # Проверяем что задача в матче; из задачи нужен только нормализованный ответ
+    answer_normalized = await session.scalar(
+        select(Task.answer_normalized)
+        .join(MatchTask, MatchTask.task_id == Task.id)
+        .where(
             (MatchTask.match_id == match_id)
             & (MatchTask.task_id == task_id)
         )
     )
-    match_task = task_result.scalar_one_or_none()
-    if not match_task:
+    if answer_normalized is None:
         raise HTTPException(status_code=404, detail="Задача не найдена в этом матче")
 
-    # UPSERT: SELECT → UPDATE или INSERT
-    result = await session.execute(
-        select(MatchAnswer).where(
-            (MatchAnswer.match_id == match_id)
-            & (MatchAnswer.user_id == user_id)
-            & (MatchAnswer.task_id == task_id)
-        )
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        # UPDATE существующего ответа
-        existing.answer = answer
-        # is_correct должен устанавливаться системой проверки
-        # Здесь упрощённо: проверяем содержит ли ответ часть правильного
-        existing.is_correct = match_task.task.answer.lower() in answer.lower()
-        await session.commit()
-        await session.refresh(existing)
-        return {
-            "action": "updated",
-            "message": "✓ Ответ обновлён (UPDATE паттерн)",
-            "data": {
-                "match_id": existing.match_id,
-                "user_id": existing.user_id,
-                "task_id": existing.task_id,
-                "is_correct": existing.is_correct,
-                "submitted_at": existing.submitted_at.isoformat(),
-            },
-        }
-    else:
-        # INSERT нового ответа
-        new_answer = MatchAnswer(
+    # is_correct должен устанавливаться системой проверки
+    # Здесь упрощённо: проверяем содержит ли ответ часть правильного
+    is_correct = answer_normalized in answer.lower()
+
+    # UPSERT одним запросом: INSERT ... ON CONFLICT (match_id, user_id, task_id) DO UPDATE.
+    # Атомарно, без окна гонки между SELECT и INSERT при одновременных ответах.
+    # xmax = 0 только у только что вставленной строки - так отличаем INSERT от UPDATE
+    upsert_query = (
+        pg_insert(MatchAnswer)
+        .values(
             match_id=match_id,
             user_id=user_id,
             task_id=task_id,
             answer=answer,
-            is_correct=match_task.task.answer.lower() in answer.lower(),
+            is_correct=is_correct,
         )
-        session.add(new_answer)
-        await session.commit()
-        await session.refresh(new_answer)
-        return {
-            "action": "created",
-            "message": "✓ Ответ отправлен (INSERT паттерн)",
-            "data": {
-                "match_id": new_answer.match_id,
-                "user_id": new_answer.user_id,
-                "task_id": new_answer.task_id,
-                "is_correct": new_answer.is_correct,
-                "submitted_at": new_answer.submitted_at.isoformat(),
+        .on_conflict_do_update(
+            index_elements=["match_id", "user_id", "task_id"],
+            set_={
+                "answer": answer,
+                "is_correct": is_correct,
+                "submitted_at": func.now(),
             },
-        }
+        )
+        .returning(
+            MatchAnswer.match_id,
+            MatchAnswer.user_id,
+            MatchAnswer.task_id,
+            MatchAnswer.is_correct,
+            MatchAnswer.submitted_at,
+            literal_column("xmax = 0").label("inserted"),
+        )
+    )
+    row = (await session.execute(upsert_query)).one()
+    await session.commit()
+
+    if row.inserted:
+        action, message = "created", "✓ Ответ отправлен (INSERT паттерн)"
+    else:
+        action, message = "updated", "✓ Ответ обновлён (UPDATE паттерн)"
+
+    return {
+        "action": action,
+        "message": message,
+        "data": {
+            "match_id": row.match_id,
+            "user_id": row.user_id,
+            "task_id": row.task_id,
+            "is_correct": row.is_correct,
+            "submitted_at": row.submitted_at,
+        },
+    }
 
 
 @router.post("/{match_id}/finish", summary="Завершить матч")
@@ -335,50 +340,74 @@ async def finish_match(
     """
     Завершить матч и рассчитать результаты.
 
-    **Что происходит:**
+    **Что происходит (одним UPDATE):**
     1. Подсчитываются баллы обоих игроков
     2. Определяется победитель
     3. Рассчитывается изменение рейтинга (упрощённо)
     4. Статус меняется на "finished"
     """
-    result = await session.execute(
-        select(Match).where(Match.id == match_id)
-    )
-    match = result.scalar_one_or_none()
-    if not match:
-        raise HTTPException(status_code=404, detail="Матч не найден")
-
-    # Подсчитываем баллы
-    answers_result = await session.execute(
-        select(MatchAnswer).where(MatchAnswer.match_id == match_id)
+    # Баллы игроков: COUNT(*) FILTER по ответам матча (одна строка p1, p2).
+    # Алиас m - чтобы подзапрос не коррелировал с обновляемой таблицей matches
+    m = aliased(Match, name="m")
+    scores = (
+        select(
+            func.count()
+            .filter(MatchAnswer.is_correct.is_(True), MatchAnswer.user_id == m.player1_id)
+            .label("p1"),
+            func.count()
+            .filter(MatchAnswer.is_correct.is_(True), MatchAnswer.user_id == m.player2_id)
+            .label("p2"),
+        )
+        .select_from(m)
+        .outerjoin(MatchAnswer, MatchAnswer.match_id == m.id)
+        .where(m.id == match_id)
+        .subquery("scores")
     )
-    answers = answers_result.scalars().all()
 
-    player1_score = sum(
-        1 for a in answers if a.user_id == match.player1_id and a.is_correct
-    )
-    player2_score = sum(
-        1 for a in answers if a.user_id == match.player2_id and a.is_correct
+    # Подсчёт баллов, победитель, изменение рейтинга (упрощённо ±25) и смена статуса -
+    # одним UPDATE ... FROM scores ... RETURNING, атомарно относительно новых ответов
+    result = await session.execute(
+        update(Match)
+        .where(Match.id == match_id)
+        .values(
+            player1_score=scores.c.p1,
+            player2_score=scores.c.p2,
+            winner_id=case(
+                (scores.c.p1 > scores.c.p2, Match.player1_id),
+                (scores.c.p2 > scores.c.p1, Match.player2_id),
+                else_=None,
+            ),
+            player1_rating_change=case(
+                (scores.c.p1 > scores.c.p2, 25),
+                (scores.c.p2 > scores.c.p1, -25),
+                else_=0,
+            ),
+            player2_rating_change=case(
+                (scores.c.p2 > scores.c.p1, 25),
+                (scores.c.p1 > scores.c.p2, -25),
+                else_=0,
+            ),
+            status=MatchStatus.FINISHED,
+            # Время ставит БД (UTC, колонка TIMESTAMP WITHOUT TIME ZONE)
+            finished_at=func.timezone("utc", func.now()),
+        )
+        .returning(
+            Match.id,
+            Match.status,
+            Match.player1_id,
+            Match.player2_id,
+            Match.player1_score,
+            Match.player2_score,
+            Match.player1_rating_change,
+            Match.player2_rating_change,
+            Match.winner_id,
+            Match.finished_at,
+        )
+        .execution_options(synchronize_session=False)
     )
-
-    # Определяем победителя
-    match.player1_score = player1_score
-    match.player2_score = player2_score
-
-    if player1_score > player2_score:
-        match.winner_id = match.player1_id
-        match.player1_rating_change = 25
-        match.player2_rating_change = -25
-    elif player2_score > player1_score:
-        match.winner_id = match.player2_id
-        match.player1_rating_change = -25
-        match.player2_rating_change = 25
-    else:
-        match.player1_rating_change = 0
-        match.player2_rating_change = 0
-
-    match.status = MatchStatus.FINISHED
-    match.finished_at = datetime.utcnow()
+    match = result.one_or_none()
+    if match is None:
+        raise HTTPException(status_code=404, detail="Матч не найден")
 
     await session.commit()
 
@@ -396,22 +425,31 @@ async def finish_match(
             "rating_change": match.player2_rating_change,
         },
         "winner_id": match.winner_id,
-        "finished_at": match.finished_at.isoformat(),
+        "finished_at": match.finished_at,
         "message": "✓ Матч завершён",
     }
 
 
 @router.get("", summary="Список активных матчей")
 async def list_active_matches(
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_db_ro),
 ):
     """
     Получить все активные матчи.
 
     Фильтр: status = 'active'
     """
+    # Нужны только имена игроков: задачи и ответы не загружаем
     result = await session.execute(
-        select(Match).where(Match.status == MatchStatus.ACTIVE)
+        select(Match)
+        .where(Match.status == MatchStatus.ACTIVE)
+        .options(
+            joinedload(Match.player1),
+            joinedload(Match.player2),
+            noload(Match.winner),
+            noload(Match.tasks),
+            noload(Match.answers),
+        )
     )
     matches = result.scalars().all()
 
@@ -423,7 +461,7 @@ async def list_active_matches(
                 "player1": m.player1.username,
                 "player2": m.player2.username,
                 "score": f"{m.player1_score}-{m.player2_score}",
-                "created_at": m.created_at.isoformat(),
+                "created_at": m.created_at,
             }
             for m in matches
         ],
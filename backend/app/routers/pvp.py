@@ -9,20 +9,21 @@ session.begin() вызывать НЕЛЬЗЯ.
 
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload, noload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user
-from app.models.match import Match
+from app.models.match import Match, MatchTask
 from app.models.user import User
 from app.models.enums import MatchStatus
 from app.services.matching import find_or_create_match, cancel_waiting_match
 from app.services.match_logic import finalize_match_forfeit
 from app.schemas.match import MatchResponse, MatchDetailResponse, CancelResponse, OpponentInfo
 from app.schemas.websocket import MatchEndEvent
+from app.utils.responses import PydanticResponse
 from app.websocket.manager import manager
 
 logger = logging.getLogger(__name__)
@@ -30,6 +31,25 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/pvp", tags=["pvp"])
 
+# Запрос деталей матча строится один раз при импорте (match_id - bindparam).
+# Явные options() вместо модельных defaults:
+#   player1, player2: LEFT OUTER JOIN; winner и answers в ответе не нужны
+#   tasks (вместе с Task): один IN-query, без обратного JOIN к matches
+_MATCH_DETAIL_BY_ID = (
+    select(Match)
+    .where(Match.id == bindparam("match_id"))
+    .options(
+        joinedload(Match.player1),
+        joinedload(Match.player2),
+        noload(Match.winner),
+        noload(Match.answers),
+        selectinload(Match.tasks).options(
+            joinedload(MatchTask.task),
+            noload(MatchTask.match),
+        ),
+    )
+)
+
 
 @router.post(
     "/find",
@@ -49,8 +69,8 @@ async def find_match(
     """
     POST /api/pvp/find
 
-    Транзакция уже открыта. Вызываем сервис, потом commit.
-    После commit загружаем Match свежим SELECT для relationships.
+    Транзакция уже открыта. Вызываем сервис, читаем соперника, потом commit.
+    Повторный SELECT матча после commit не нужен.
     """
     try:
         # Сервис выполняет guard, FOR UPDATE, flush, но НЕ commit
@@ -68,41 +88,31 @@ async def find_match(
         logger.exception(f"Error in find_or_create_match: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    # Коммитим всё: Match row + MatchTask rows (если match стал active)
-    match_id = match.id
-    await db.commit()
-
-    # После commit: свежий SELECT с eager loading relationships
-    # populate_existing=True заставляет SQLAlchemy перезагрузить объект из БД,
-    # даже если он уже в session (с noload() из matching service)
-    result = await db.execute(
-        select(Match)
-        .where(Match.id == match_id)
-        .options(joinedload(Match.player1), joinedload(Match.player2))
-        .execution_options(populate_existing=True)
-    )
-    match = result.unique().scalar_one()
-
-    # Построение response: opponent зависит от статуса и позиции игрока
+    # Построение response: opponent нужен только в active матче.
+    # id, статус и игроки уже есть в объекте после flush сервиса; из БД
+    # (в той же транзакции, до commit) читаем только id/username/rating соперника
     opponent = None
     if match.status == MatchStatus.ACTIVE:
-        # Определяем кто мы и кто opponent
-        if current_user.id == match.player1_id:
-            # Мы player1, opponent = player2
-            if match.player2 is not None:
-                opponent = OpponentInfo(
-                    id=match.player2.id,
-                    username=match.player2.username,
-                    rating=match.player2.rating,
-                )
-        else:
-            # Мы player2, opponent = player1
-            if match.player1 is not None:
-                opponent = OpponentInfo(
-                    id=match.player1.id,
-                    username=match.player1.username,
-                    rating=match.player1.rating,
+        # Мы player1 -> opponent = player2, иначе opponent = player1
+        opponent_id = (
+            match.player2_id if current_user.id == match.player1_id else match.player1_id
+        )
+        if opponent_id is not None:
+            # Узкий SELECT, а не кэш пользователей: кэш свой у каждого worker'а,
+            # и рейтинг соперника мог уже измениться в другом процессе
+            opponent_row = (
+                await db.execute(
+                    select(User.id, User.username, User.rating).where(User.id == opponent_id)
                 )
+            ).one()
+            opponent = OpponentInfo(
+                id=opponent_row.id,
+                username=opponent_row.username,
+                rating=opponent_row.rating,
+            )
+
+    # Коммитим всё: Match row + MatchTask rows (если match стал active)
+    await db.commit()
 
     return MatchResponse(
         match_id=match.id,
@@ -158,19 +168,14 @@ async def get_match_detail(
     match_id: int,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> MatchDetailResponse:
+) -> PydanticResponse:
     """
     GET /api/pvp/match/{match_id}
 
-    Простой SELECT. Модельные lazy-стратегии загружают relationships автоматически.
+    Загружается ровно то, что нужно MatchDetailResponse: игроки и задачи.
     player2 может быть None (waiting match) -- LEFT JOIN обрабатывает это корректно.
     """
-    # Без options() -- используются модельные defaults:
-    #   player1, player2, winner: lazy="joined" --> LEFT OUTER JOIN
-    #   tasks, answers: lazy="selectin" --> отдельный IN-query
-    result = await db.execute(
-        select(Match).where(Match.id == match_id)
-    )
+    result = await db.execute(_MATCH_DETAIL_BY_ID, {"match_id": match_id})
     match = result.scalar_one_or_none()
 
     if match is None:
@@ -186,7 +191,9 @@ async def get_match_detail(
             detail="Вы не участник этого матча",
         )
 
-    return MatchDetailResponse.from_match(match)
+    # Ответ уже собран как MatchDetailResponse - сериализуем его один раз,
+    # без повторной валидации задач (text, hints) по response_model
+    return PydanticResponse(MatchDetailResponse.from_match(match))
 
 @router.post(
     "/match/{match_id}/forfeit",
@@ -197,6 +204,7 @@ async def get_match_detail(
 )
 async def forfeit_match(
     match_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
@@ -207,15 +215,17 @@ async def forfeit_match(
     - Соперник получает победу
     - Рейтинги обновляются через ELO систему
     - Матч переводится в статус FINISHED
-    - match_end событие отправляется обоим игрокам через WebSocket
+    - match_end событие отправляется обоим игрокам через WebSocket (после ответа)
     """
-    # Получить матч
+    # Получить матч: для проверок нужны только игроки и статус, без JOIN'ов
+    # к users (сам матч целиком загружает finalize_match_forfeit)
     result = await db.execute(
-        select(Match).where(Match.id == match_id)
+        select(Match.player1_id, Match.player2_id, Match.status)
+        .where(Match.id == match_id)
     )
-    match = result.scalar_one_or_none()
+    match = result.first()
 
-    if not match:
+    if match is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Матч не найден"
@@ -238,14 +248,10 @@ async def forfeit_match(
     # Использовать finalize_match_forfeit для корректного ELO расчёта
     try:
         result_data = await finalize_match_forfeit(match_id, current_user.id, db)
-        await db.commit()
-
-        logger.info(
-            f"Match {match_id}: User {current_user.id} forfeited via REST API, "
-            f"winner={result_data['winner_id']}"
-        )
 
-        # Отправить match_end событие через WebSocket обоим игрокам
+        # match_end событие собирается до commit: после commit остаётся только отправка.
+        # Отправлять параллельно с commit нельзя - клиент по match_end запрашивает
+        # итоги матча и не должен увидеть их до фиксации транзакции
         match_end_event = MatchEndEvent(
             reason="forfeit",
             winner_id=result_data["winner_id"],
@@ -257,12 +263,20 @@ async def forfeit_match(
                 "player1_score": result_data["final_scores"]["player1_score"],
                 "player2_score": result_data["final_scores"]["player2_score"],
             },
+        ).model_dump()
+
+        await db.commit()
+
+        logger.info(
+            f"Match {match_id}: User {current_user.id} forfeited via REST API, "
+            f"winner={result_data['winner_id']}"
         )
 
-        # Broadcast to both players (if connected)
-        await manager.broadcast(match_id, match_end_event.model_dump())
+        # Broadcast to both players (if connected) - после отправки HTTP ответа,
+        # клиент REST запроса не ждёт рассылки по WebSocket
+        background_tasks.add_task(manager.broadcast, match_id, match_end_event)
 
-        logger.info(f"Match {match_id}: match_end event broadcasted via WebSocket")
+        logger.info(f"Match {match_id}: match_end event scheduled for WebSocket broadcast")
 
         # Определить изменение рейтинга для текущего пользователя (проигравший)
         is_player1 = current_user.id == match.player1_id
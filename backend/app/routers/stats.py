@@ -1,11 +1,12 @@
 """
 Public stats router - статистика платформы без авторизации
 """
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import BigInteger, case, cast, column, func, select, table
 
-from app.database import get_db
+from app.database import get_db_ro
 from app.models.task import Task
 from app.models.user import User
 from app.models.match import Match
@@ -13,52 +14,86 @@ from app.models.enums import MatchStatus
 
 router = APIRouter(prefix="/api/stats", tags=["stats"])
 
+# Время жизни закэшированной публичной статистики (секунды)
+PUBLIC_STATS_CACHE_TTL_SECONDS = 30
+
+# Кэш ответа /public в памяти процесса: эндпоинт без авторизации,
+# счётчики меняются медленно, а запрашивается он на каждой загрузке главной
+_public_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=PUBLIC_STATS_CACHE_TTL_SECONDS)
+
+# Начиная с этого числа строк total_tasks/total_users берутся из оценки
+# планировщика (pg_class.reltuples, обновляется ANALYZE) вместо точного COUNT:
+# на больших таблицах это O(1) чтение каталога вместо полного сканирования.
+# На маленьких таблицах оценка может сильно отставать - там считаем точно
+ROW_ESTIMATE_THRESHOLD = 100_000
+
+_pg_class = table("pg_class", column("oid"), column("reltuples"))
+
+
+def _row_count(model):
+    """
+    Скалярный подзапрос числа строк таблицы модели.
+
+    Оценка reltuples, если таблица большая (и уже проанализирована),
+    иначе точный COUNT(*).
+    """
+    estimate = (
+        select(_pg_class.c.reltuples)
+        .where(_pg_class.c.oid == func.to_regclass(model.__tablename__))
+        .scalar_subquery()
+    )
+    exact = select(func.count()).select_from(model).scalar_subquery()
+    return case(
+        (estimate >= ROW_ESTIMATE_THRESHOLD, cast(estimate, BigInteger)),
+        else_=exact,
+    )
+
 
 @router.get("/public")
 async def get_public_stats(
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_db_ro),
 ) -> dict:
     """
     Публичная статистика платформы (без авторизации)
 
     Returns:
-        - total_tasks: количество задач
-        - total_users: количество пользователей
+        - total_tasks: количество задач (для больших таблиц - оценка PostgreSQL)
+        - total_users: количество пользователей (для больших таблиц - оценка PostgreSQL)
         - total_matches: количество завершённых матчей
         - active_matches: количество активных матчей
-    """
 
-    # Total tasks
-    task_count_result = await session.execute(
-        select(func.count(Task.id))
-    )
-    total_tasks = task_count_result.scalar() or 0
-
-    # Total users
-    user_count_result = await session.execute(
-        select(func.count(User.id))
-    )
-    total_users = user_count_result.scalar() or 0
-
-    # Total finished matches
-    finished_count_result = await session.execute(
-        select(func.count(Match.id)).where(
-            Match.status == MatchStatus.FINISHED
-        )
-    )
-    total_matches = finished_count_result.scalar() or 0
+    Результат кэшируется на PUBLIC_STATS_CACHE_TTL_SECONDS секунд.
+    """
+    cached = _public_stats_cache.get("stats")
+    if cached is not None:
+        return cached
 
-    # Active matches (ACTIVE or WAITING)
-    active_count_result = await session.execute(
-        select(func.count(Match.id)).where(
-            Match.status.in_([MatchStatus.ACTIVE, MatchStatus.WAITING])
-        )
+    # Все четыре счётчика одним запросом (один round-trip к PostgreSQL) из
+    # скалярных подзапросов. У подзапросов по matches свой WHERE, поэтому
+    # каждый читает только индекс: завершённые - ix_matches_status_created,
+    # активные - частичный ix_matches_status_open
+    query = select(
+        _row_count(Task).label("total_tasks"),
+        _row_count(User).label("total_users"),
+        select(func.count())
+        .select_from(Match)
+        .where(Match.status == MatchStatus.FINISHED)
+        .scalar_subquery()
+        .label("total_matches"),
+        select(func.count())
+        .select_from(Match)
+        .where(Match.status.in_([MatchStatus.ACTIVE, MatchStatus.WAITING]))
+        .scalar_subquery()
+        .label("active_matches"),
     )
-    active_matches = active_count_result.scalar() or 0
+    counters = (await session.execute(query)).one()
 
-    return {
-        "total_tasks": total_tasks,
-        "total_users": total_users,
-        "total_matches": total_matches,
-        "active_matches": active_matches,
+    stats = {
+        "total_tasks": counters.total_tasks or 0,
+        "total_users": counters.total_users or 0,
+        "total_matches": counters.total_matches or 0,
+        "active_matches": counters.active_matches or 0,
     }
+    _public_stats_cache["stats"] = stats
+
+    return stats
@@ -1,19 +1,85 @@
+import hashlib
+from datetime import datetime, timezone
 from typing import Optional
 from math import ceil
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Text, bindparam, case, exists, select, func, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import Task, User, UserTaskAttempt, UserAchievement
-from app.schemas.task import TaskInList, TaskDetail, PaginatedTaskResponse, TaskCheckRequest, TaskCheckResponse
-from app.routers.auth import get_current_user
+from app.models.task import normalize_answer_sql
+from app.schemas.task import TaskDetail, PaginatedTaskResponse, TaskCheckRequest, TaskCheckResponse
+from app.dependencies.auth import get_current_user
+from app.services.user_cache import invalidate_cached_user
+from app.services.user_stats import invalidate_user_stats
 
 
 # API роутер для работы с задачами
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+# Запросы с фиксированной формой строятся один раз при импорте, а не на каждый
+# вызов; значения передаются через bindparam при execute
+# (скомпилированный SQL берётся из кэша SQLAlchemy, prepared statement - из кэша asyncpg)
+_TASK_BY_ID = select(Task).where(Task.id == bindparam("task_id"))
+
+# Кэш задачи у браузера/прокси: хранить можно, но перед использованием
+# перепроверять по ETag - правки администратора видны сразу, а неизменённая
+# задача отдаётся ответом 304 без тела
+TASK_CACHE_CONTROL = "public, no-cache"
+
+
+def _task_etag(task: Task) -> str:
+    """
+    Слабый ETag задачи: меняется при каждом изменении строки (updated_at).
+
+    Слабый (W/), потому что GZipMiddleware отдаёт ту же задачу и сжатым телом,
+    а оно не совпадает побайтно с несжатым.
+    """
+    digest = hashlib.md5(
+        f"{task.id}:{task.updated_at.timestamp()}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """Слабое сравнение ETag с заголовком If-None-Match (префикс W/ не учитывается)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag
+        for tag in if_none_match.split(",")
+    )
+
+
+# Колонки задачи для списка (поля схемы TaskInList)
+TASK_LIST_COLUMNS = (
+    Task.id,
+    Task.subject,
+    Task.topic,
+    Task.difficulty,
+    Task.title,
+    Task.created_at,
+)
+
+# Проверка ответа целиком в PostgreSQL: ответ пользователя передаётся как есть
+# и нормализуется тем же выражением, что и колонка answer_normalized.
+# FOR KEY SHARE - та же блокировка, что берёт внешний ключ при вставке попытки,
+# только раньше, до UPDATE users: порядок блокировок (задача, затем пользователь)
+# совпадает с удалением задачи (admin delete_task) и не даёт взаимной блокировки
+_TASK_ANSWER_CHECK = select(
+    Task.answer,
+    (
+        Task.answer_normalized == normalize_answer_sql(bindparam("user_answer", type_=Text))
+    ).label("is_correct"),
+).where(Task.id == bindparam("task_id")).with_for_update(read=True, key_share=True)
+
 
 @router.get(
     "",
@@ -30,8 +96,10 @@ async def get_tasks(
     difficulty: Optional[int] = Query(None, ge=1, le=5, description="Фильтр по сложности (1-5)"),
     page: int = Query(1, ge=1, description="Номер страницы (начиная с 1)"),
     per_page: int = Query(20, ge=1, le=100, description="Количество задач на странице (max 100)"),
+    after_created_at: Optional[datetime] = Query(None, description="Курсор: created_at последней задачи предыдущей страницы"),
+    after_id: Optional[int] = Query(None, description="Курсор: id последней задачи предыдущей страницы"),
     db: AsyncSession = Depends(get_db)
-) -> PaginatedTaskResponse:
+) -> ORJSONResponse:
     """
     Получение списка задач с фильтрацией и пагинацией.
 
@@ -41,6 +109,8 @@ async def get_tasks(
         difficulty: Фильтр по сложности 1-5 (опционально)
         page: Номер страницы (начиная с 1)
         per_page: Размер страницы (максимум 100)
+        after_created_at, after_id: Курсор keyset-пагинации (передаются вместе,
+            значения берутся из next_cursor предыдущего ответа; page тогда не используется)
         db: Асинхронная сессия БД
 
     Returns:
@@ -51,47 +121,103 @@ async def get_tasks(
         - В списке НЕ возвращаются поля text и hints (только краткая информация)
     """
 
-    # Базовый запрос для выборки задач
-    query = select(Task)
-
-    # Применение фильтров (динамически добавляем where только если параметр указан)
+    # Условия фильтрации (добавляем только если параметр указан);
+    # один и тот же список используется и для выборки, и для подсчёта
+    conditions = []
     if subject is not None:
-        query = query.where(Task.subject == subject)
+        conditions.append(Task.subject == subject)
 
     if topic is not None:
-        query = query.where(Task.topic == topic)
+        conditions.append(Task.topic == topic)
 
     if difficulty is not None:
-        query = query.where(Task.difficulty == difficulty)
+        conditions.append(Task.difficulty == difficulty)
 
-    # Запрос для подсчёта общего количества задач (с учётом фильтров)
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+    if (after_created_at is None) != (after_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_created_at и after_id передаются вместе"
+        )
 
-    # Вычисление количества страниц
-    pages = ceil(total / per_page) if total > 0 else 0
+    # created_at хранится как TIMESTAMP WITHOUT TIME ZONE (UTC): курсор со смещением
+    # (например, ...+00:00) приводим к naive UTC, иначе asyncpg не примет значение
+    if after_created_at is not None and after_created_at.tzinfo is not None:
+        after_created_at = after_created_at.astimezone(timezone.utc).replace(tzinfo=None)
 
-    # Добавление пагинации к основному запросу
+    # Сортировка по умолчанию (по дате создания, новые первыми; id - для
+    # однозначного порядка при равных created_at).
+    # Выбираются только колонки TaskInList - без text/answer/hints и без
+    # создания ORM-объектов Task
     offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
-
-    # Сортировка по умолчанию (по дате создания, новые первыми)
-    query = query.order_by(Task.created_at.desc())
-
-    # Выполнение запроса
-    result = await db.execute(query)
-    tasks = result.scalars().all()
-
-    # Формирование ответа
-    return PaginatedTaskResponse(
-        items=[TaskInList.model_validate(task) for task in tasks],
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=pages
+    query = (
+        select(*TASK_LIST_COLUMNS)
+        .where(*conditions)
+        .order_by(Task.created_at.desc(), Task.id.desc())
     )
+    count_query = select(func.count(Task.id)).where(*conditions)
+
+    if after_id is not None:
+        # Keyset-пагинация: продолжаем сразу после курсора по индексу
+        # (created_at DESC, id DESC) - без OFFSET, стоимость не растёт с глубиной.
+        # total не считается (COUNT по всем строкам свёл бы выигрыш на нет):
+        # он уже известен клиенту из первой страницы
+        rows = (
+            await db.execute(
+                query.where(tuple_(Task.created_at, Task.id) < (after_created_at, after_id))
+                .limit(per_page + 1)
+            )
+        ).mappings().all()
+        items = [dict(row) for row in rows[:per_page]]
+        has_more = len(rows) > per_page
+        total = None
+    else:
+        # Страница и total одним запросом (включая первую страницу): count() OVER ()
+        # считается по всем строкам под фильтрами до LIMIT/OFFSET (вместо отдельного COUNT)
+        rows = (
+            await db.execute(
+                query.add_columns(func.count().over().label("total"))
+                .offset(offset)
+                .limit(per_page)
+            )
+        ).mappings().all()
+        items = []
+        for row in rows:
+            item = dict(row)
+            del item["total"]
+            items.append(item)
+
+        if rows:
+            total = rows[0]["total"]
+        else:
+            # Страница за пределами выборки - total узнаем отдельным запросом
+            total = (await db.execute(count_query)).scalar() or 0
+        has_more = offset + len(items) < total
 
+    # Вычисление количества страниц
+    if total is None:
+        pages = None
+    else:
+        pages = ceil(total / per_page) if total > 0 else 0
+
+    # Курсор следующей страницы - по последней задаче текущей
+    next_cursor = None
+    if has_more and items:
+        next_cursor = {
+            "after_created_at": items[-1]["created_at"],
+            "after_id": items[-1]["id"],
+        }
+
+    # Формирование ответа: строки уже содержат ровно поля TaskInList и
+    # сериализуются orjson без повторной валидации каждой задачи через Pydantic
+    # (response_model остаётся для документации OpenAPI)
+    return ORJSONResponse({
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": pages,
+        "next_cursor": next_cursor,
+    })
 
 @router.get(
     "/{task_id}",
@@ -104,13 +230,20 @@ async def get_tasks(
 )
 async def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db)
-) -> Task:
+) -> Task | Response:
     """
     Получение детальной информации о задаче по ID.
 
+    Ответ отдаётся с ETag и Cache-Control: повторный запрос с If-None-Match
+    получает 304 Not Modified без тела.
+
     Args:
         task_id: ID задачи
+        request: Запрос (для заголовка If-None-Match)
+        response: Ответ (для заголовков ETag и Cache-Control)
         db: Асинхронная сессия БД
 
     Returns:
@@ -125,8 +258,7 @@ async def get_task(
     """
 
     # Запрос задачи по ID
-    query = select(Task).where(Task.id == task_id)
-    result = await db.execute(query)
+    result = await db.execute(_TASK_BY_ID, {"task_id": task_id})
     task = result.scalar_one_or_none()
 
     # Обработка случая, когда задача не найдена
@@ -136,6 +268,17 @@ async def get_task(
             detail=f"Задача с ID {task_id} не найдена"
         )
 
+    # Условный запрос: клиент уже имеет актуальную версию задачи
+    etag = _task_etag(task)
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": TASK_CACHE_CONTROL,
+    }
+    if _etag_matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    response.headers.update(cache_headers)
+
     # FastAPI автоматически сериализует через TaskDetail
     # (без поля answer, т.к. оно не определено в схеме)
     return task
@@ -157,7 +300,7 @@ async def check_task_answer(
     check_data: TaskCheckRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
-) -> TaskCheckResponse:
+) -> dict:
     """
     Проверка ответа пользователя на задачу.
 
@@ -180,10 +323,19 @@ async def check_task_answer(
         - Сравнение ответов case-insensitive с удалением пробельных символов
     """
 
-    # === 1. Получение задачи из БД ===
-    query = select(Task).where(Task.id == task_id)
-    result = await db.execute(query)
-    task = result.scalar_one_or_none()
+    # === 1. Ответ пользователя ===
+    # Регистр и пробелы по краям не учитываются: ответ нормализуется в БД
+    # (normalize_answer_sql в _TASK_ANSWER_CHECK), правильный ответ уже
+    # нормализован там же - колонка answer_normalized
+    user_answer = check_data.answer
+
+    # === 2. Проверка правильности ответа в БД ===
+    # Одна узкая строка: исходный ответ (для показа) и результат сравнения,
+    # без text/hints и остальных колонок задачи
+    result = await db.execute(
+        _TASK_ANSWER_CHECK, {"task_id": task_id, "user_answer": user_answer}
+    )
+    task = result.first()
 
     # Обработка случая, когда задача не найдена
     if task is None:
@@ -192,16 +344,32 @@ async def check_task_answer(
             detail=f"Задача с ID {task_id} не найдена"
         )
 
-    # === 2. Нормализация ответов для сравнения ===
-    # Приводим оба ответа к нижнему регистру и убираем пробелы по краям
-    # Это позволяет игнорировать различия в регистре и лишние пробелы
-    user_answer = check_data.answer.strip().lower()
-    correct_answer = task.answer.strip().lower()
+    is_correct = task.is_correct
 
-    # === 3. Проверка правильности ответа ===
-    is_correct = (user_answer == correct_answer)
+    # === 3.5. Сохранение попытки и счётчиков пользователя в БД ===
+    # Счётчики в users увеличиваются одним UPDATE ... RETURNING до вставки попытки
+    # (строка users блокируется до commit - параллельные ответы того же пользователя
+    # выполняются по очереди); unique_solved растёт, только если задача ещё не решена
+    already_solved = exists().where(
+        UserTaskAttempt.user_id == current_user.id,
+        UserTaskAttempt.task_id == task_id,
+        UserTaskAttempt.is_correct == True
+    )
+    counters = await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(
+            total_attempts=User.total_attempts + 1,
+            correct_attempts=User.correct_attempts + int(is_correct),
+            unique_solved=User.unique_solved + (
+                case((already_solved, 0), else_=1) if is_correct else 0
+            ),
+        )
+        .returning(User.unique_solved)
+        .execution_options(synchronize_session=False)
+    )
+    unique_solved = counters.scalar_one()
 
-    # === 3.5. Сохранение попытки в БД ===
     attempt = UserTaskAttempt(
         user_id=current_user.id,
         task_id=task_id,
@@ -213,26 +381,18 @@ async def check_task_answer(
 
     # === 3.6. Проверка и выдача достижений (только для правильных ответов) ===
     if is_correct:
-        # Получить количество уникальных решённых задач
-        unique_solved_query = select(
-            func.count(func.distinct(UserTaskAttempt.task_id))
-        ).where(
-            UserTaskAttempt.user_id == current_user.id,
-            UserTaskAttempt.is_correct == True
-        )
-        unique_result = await db.execute(unique_solved_query)
-        unique_solved = unique_result.scalar() or 0
+        # Количество уникальных решённых задач уже вернул UPDATE счётчиков
 
         # Достижение: "first_solve" (первое решение)
         if unique_solved == 1:
             # Проверить что достижение ещё не выдано
             existing = await db.execute(
-                select(UserAchievement).where(
+                select(UserAchievement.id).where(
                     UserAchievement.user_id == current_user.id,
                     UserAchievement.type == "first_solve"
                 )
             )
-            if not existing.scalar_one_or_none():
+            if existing.scalar_one_or_none() is None:
                 achievement = UserAchievement(
                     user_id=current_user.id,
                     type="first_solve",
@@ -244,12 +404,12 @@ async def check_task_answer(
         # Достижение: "solved_10" (10 задач)
         if unique_solved == 10:
             existing = await db.execute(
-                select(UserAchievement).where(
+                select(UserAchievement.id).where(
                     UserAchievement.user_id == current_user.id,
                     UserAchievement.type == "solved_10"
                 )
             )
-            if not existing.scalar_one_or_none():
+            if existing.scalar_one_or_none() is None:
                 achievement = UserAchievement(
                     user_id=current_user.id,
                     type="solved_10",
@@ -261,20 +421,26 @@ async def check_task_answer(
         # Сохранить достижения если были выданы
         await db.commit()
 
+    # Новая попытка (и, возможно, достижение) - закэшированные /me/stats
+    # и пользователь (со старыми счётчиками) устарели
+    invalidate_user_stats(current_user.id)
+    invalidate_cached_user(current_user.id)
+
     # === 4. Формирование ответа ===
+    # Простой dict: FastAPI один раз валидирует его по response_model=TaskCheckResponse
     if is_correct:
         # Правильный ответ - НЕ раскрываем правильный ответ
-        return TaskCheckResponse(
-            is_correct=True,
-            message="Верно!",
-            correct_answer=None
-        )
+        return {
+            "is_correct": True,
+            "message": "Верно!",
+            "correct_answer": None,
+        }
     else:
         # Неправильный ответ - показываем правильный ответ
         # ВАЖНО: используем оригинальный task.answer (не нормализованный),
         # чтобы показать ответ в правильном формате
-        return TaskCheckResponse(
-            is_correct=False,
-            message="Неверно, попробуйте ещё раз",
-            correct_answer=task.answer
-        )
+        return {
+            "is_correct": False,
+            "message": "Неверно, попробуйте ещё раз",
+            "correct_answer": task.answer,
+        }
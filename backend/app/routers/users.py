@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import select, func, case, desc
+import asyncio
+import hashlib
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import JSON, bindparam, case, desc, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 from typing import Optional
+from pydantic import BaseModel, TypeAdapter
 
-from app.database import get_db
-from app.models import User, UserTaskAttempt, Task, UserAchievement, Match
+from app.database import async_session_maker, get_db
+from app.models import User, UserTaskAttempt, Task, UserAchievement
 from app.dependencies.auth import get_current_user
+from app.utils.responses import PydanticResponse
+from app.services.user_stats import (
+    USER_STATS_CACHE_TTL_SECONDS,
+    match_stats_cache,
+    user_stats_cache,
+)
 from app.schemas.stats import (
     UserStatsResponse,
-    DifficultyStats,
     RecentActivityItem,
     AchievementItem
 )
@@ -20,7 +31,6 @@ from app.schemas.match_history import (
 from app.services.match_history import (
     get_match_history,
     get_match_detail,
-    get_match_stats,
     get_detailed_match_stats,
 )
 from app.schemas.leaderboard import LeaderboardResponse
@@ -31,162 +41,258 @@ from app.services.leaderboard import get_leaderboard
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
-@router.get(
-    "/me/stats",
-    response_model=UserStatsResponse,
-    summary="Получить статистику текущего пользователя",
-    description=(
-        "Возвращает полную статистику по решению задач для авторизованного пользователя. "
-        "Включает общее количество попыток, точность, статистику по сложности, "
-        "последнюю активность и полученные достижения."
-    )
-)
-async def get_user_stats(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-) -> UserStatsResponse:
-    """
-    Получение статистики пользователя.
+# Сколько дополнительных соединений пула (на worker) одновременно заняты
+# параллельными запросами /me/stats: при всплеске запросов статистика ждёт
+# своей очереди, а не выбирает весь пул у остальных endpoint'ов
+STATS_PARALLEL_QUERIES_LIMIT = 6
 
-    Требует JWT аутентификации.
-    Возвращает только статистику текущего пользователя (безопасность).
+_stats_queries_semaphore = asyncio.Semaphore(STATS_PARALLEL_QUERIES_LIMIT)
 
-    Args:
-        current_user: Текущий авторизованный пользователь (из JWT токена)
-        db: Асинхронная сессия БД
 
-    Returns:
-        UserStatsResponse: Полная статистика пользователя
+async def _fetch_all(query, params: dict | None = None) -> list:
     """
+    Выполняет SELECT в отдельной короткой сессии и возвращает все строки.
 
-    user_id = current_user.id
+    Нужна для параллельного выполнения независимых запросов через asyncio.gather:
+    каждая сессия берёт своё соединение из пула и сразу его возвращает.
+    Число одновременно открытых сессий ограничено STATS_PARALLEL_QUERIES_LIMIT.
+    """
+    async with _stats_queries_semaphore, async_session_maker() as session:
+        return (await session.execute(query, params)).all()
 
-    # === 1. Общая статистика: общее количество попыток ===
-    total_query = select(func.count()).select_from(UserTaskAttempt).where(
-        UserTaskAttempt.user_id == user_id
-    )
-    total_result = await db.execute(total_query)
-    total_attempts = total_result.scalar() or 0
 
-    # === 2. Общая статистика: количество правильных попыток ===
-    correct_query = select(func.count()).select_from(UserTaskAttempt).where(
-        UserTaskAttempt.user_id == user_id,
-        UserTaskAttempt.is_correct == True
-    )
-    correct_result = await db.execute(correct_query)
-    correct_attempts = correct_result.scalar() or 0
+async def _fetch_scalars(query) -> list:
+    """Выполняет ORM-запрос в отдельной сессии и возвращает список объектов."""
+    async with _stats_queries_semaphore, async_session_maker() as session:
+        return list((await session.execute(query)).scalars().all())
 
-    # === 3. Общая статистика: уникальные решённые задачи ===
-    unique_solved_query = select(
-        func.count(func.distinct(UserTaskAttempt.task_id))
-    ).where(
-        UserTaskAttempt.user_id == user_id,
-        UserTaskAttempt.is_correct == True
-    )
-    unique_result = await db.execute(unique_solved_query)
-    unique_solved = unique_result.scalar() or 0
 
-    # === 4. Расчёт точности ===
-    accuracy = (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0.0
+# Статистика пользователя по сложности строится один раз при импорте (user_id - bindparam):
+# на каждый запрос к /me/stats не собирается заново дерево выражений с
+# case/count/json_agg, а скомпилированный SQL берётся из кэша по готовому объекту
 
-    # === 5. Статистика по сложности (JOIN + GROUP BY) ===
-    difficulty_query = select(
-        Task.difficulty,
-        func.count(func.distinct(
-            case(
-                (UserTaskAttempt.is_correct == True, UserTaskAttempt.task_id),
-                else_=None
-            )
-        )).label('solved'),
-        func.count(UserTaskAttempt.id).label('total_attempts')
-    ).select_from(UserTaskAttempt).join(
-        Task, UserTaskAttempt.task_id == Task.id
-    ).where(
-        UserTaskAttempt.user_id == user_id
-    ).group_by(
-        Task.difficulty
-    ).order_by(
-        Task.difficulty
-    )
+# Строки по сложности (JOIN + GROUP BY); попытки пользователя читаются
+# по индексу ix_uta_user_* без обращения ко всей таблице
+_DIFFICULTY_GROUPS = select(
+    Task.difficulty,
+    func.count(func.distinct(
+        case(
+            (UserTaskAttempt.is_correct == True, UserTaskAttempt.task_id),
+            else_=None
+        )
+    )).label('solved'),
+    func.count(UserTaskAttempt.id).label('total_attempts')
+).select_from(UserTaskAttempt).join(
+    Task, UserTaskAttempt.task_id == Task.id
+).where(
+    UserTaskAttempt.user_id == bindparam("user_id")
+).group_by(
+    Task.difficulty
+).subquery()
+
+
+def _user_counter(column):
+    """Счётчик попыток пользователя (колонка users) скалярным подзапросом."""
+    return select(column).where(User.id == bindparam("user_id")).scalar_subquery()
+
+
+# Свежие общие счётчики и статистика по сложности одной строкой.
+# Группы сворачиваются: by_difficulty - готовый JSON-массив для DifficultyStats
+# (по возрастанию сложности), NULL если попыток нет
+_STATS_SUMMARY = select(
+    _user_counter(User.total_attempts).label('total_attempts'),
+    _user_counter(User.correct_attempts).label('correct_attempts'),
+    _user_counter(User.unique_solved).label('unique_solved'),
+    func.json_agg(
+        aggregate_order_by(
+            func.json_build_object(
+                'difficulty', _DIFFICULTY_GROUPS.c.difficulty,
+                'solved', _DIFFICULTY_GROUPS.c.solved,
+                'total_attempts', _DIFFICULTY_GROUPS.c.total_attempts,
+            ),
+            _DIFFICULTY_GROUPS.c.difficulty,
+        ),
+        type_=JSON,
+    ).label('by_difficulty'),
+)
 
-    difficulty_result = await db.execute(difficulty_query)
-    difficulty_rows = difficulty_result.all()
 
-    by_difficulty = [
-        DifficultyStats(
-            difficulty=row.difficulty,
-            solved=row.solved or 0,
-            total_attempts=row.total_attempts or 0
-        )
-        for row in difficulty_rows
-    ]
-
-    # === 6. Недавняя активность (JOIN + ORDER BY + LIMIT) ===
-    recent_query = select(
-        UserTaskAttempt.task_id,
-        Task.title.label('task_title'),
-        Task.difficulty.label('task_difficulty'),
-        UserTaskAttempt.is_correct,
-        UserTaskAttempt.created_at
-    ).select_from(UserTaskAttempt).join(
-        Task, UserTaskAttempt.task_id == Task.id
+# Пакетная валидация списков ответа /me/stats
+_RECENT_ACTIVITY_ADAPTER = TypeAdapter(list[RecentActivityItem])
+_ACHIEVEMENTS_ADAPTER = TypeAdapter(list[AchievementItem])
+
+
+def _render_stats(stats: BaseModel) -> tuple[bytes, str]:
+    """
+    Сериализует ответ статистики и считает его ETag (хэш содержимого).
+
+    Выполняется один раз при кэшировании: из кэша отдаются готовые байты.
+    """
+    body = stats.model_dump_json().encode()
+    digest = hashlib.md5(body, usedforsecurity=False).hexdigest()
+    return body, f'"{digest}"'
+
+
+# Статистика пользователя без попыток: собирается один раз при импорте
+_EMPTY_STATS = UserStatsResponse(
+    total_attempts=0,
+    correct_attempts=0,
+    accuracy=0.0,
+    unique_solved=0,
+    by_difficulty=[],
+    recent_activity=[],
+    achievements=[],
+)
+_EMPTY_STATS_RENDERED = _render_stats(_EMPTY_STATS)
+
+
+def _conditional_stats_response(request: Request, body: bytes, etag: str) -> Response:
+    """
+    Отдаёт закэшированную (уже сериализованную) статистику с ETag и Cache-Control.
+
+    Если у клиента уже есть эта версия (If-None-Match) - 304 Not Modified без тела.
+    """
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={USER_STATS_CACHE_TTL_SECONDS}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=cache_headers)
+
+    return Response(content=body, media_type="application/json", headers=cache_headers)
+
+
+async def _compute_user_stats(user_id: int) -> UserStatsResponse:
+    """Считает статистику решения задач пользователя (без кэша)."""
+
+    # === 1-2. Общие счётчики и статистика по сложности ===
+    # Одним запросом (_STATS_SUMMARY): счётчики читаются из users заново,
+    # а не из current_user - тот может прийти из кэша пользователя и
+    # отставать от только что сделанных попыток
+
+    # === 3. Недавняя активность (ORDER BY + LIMIT, задачи одним IN-query) ===
+    # Из попыток - только нужные колонки (покрываются ix_uta_user_created),
+    # из задач - только title/difficulty
+    recent_query = select(UserTaskAttempt).options(
+        load_only(
+            UserTaskAttempt.task_id,
+            UserTaskAttempt.is_correct,
+            UserTaskAttempt.created_at,
+        ),
+        selectinload(UserTaskAttempt.task).load_only(Task.title, Task.difficulty),
     ).where(
         UserTaskAttempt.user_id == user_id
     ).order_by(
         desc(UserTaskAttempt.created_at)
     ).limit(10)
 
-    recent_result = await db.execute(recent_query)
-    recent_rows = recent_result.all()
-
-    recent_activity = [
-        RecentActivityItem(
-            task_id=row.task_id,
-            task_title=row.task_title,
-            task_difficulty=row.task_difficulty,
-            is_correct=row.is_correct,
-            created_at=row.created_at
-        )
-        for row in recent_rows
-    ]
-
-    # === 7. Получение достижений пользователя ===
+    # === 4. Достижения пользователя ===
     achievements_query = select(
         UserAchievement.type,
         UserAchievement.title,
         UserAchievement.description,
-        UserAchievement.created_at
+        UserAchievement.created_at.label('unlocked_at')  # имя поля AchievementItem
     ).where(
         UserAchievement.user_id == user_id
     ).order_by(
         desc(UserAchievement.created_at)
     )
 
-    achievements_result = await db.execute(achievements_query)
-    achievements_rows = achievements_result.all()
+    # === 5. Все три независимых запроса выполняются параллельно ===
+    # (каждый в своей сессии: одна AsyncSession не допускает конкурентных запросов)
+    summary_rows, recent_attempts, achievements_rows = await asyncio.gather(
+        _fetch_all(_STATS_SUMMARY, {"user_id": user_id}),
+        _fetch_scalars(recent_query),
+        _fetch_all(achievements_query),
+    )
 
-    achievements = [
-        AchievementItem(
-            type=row.type,
-            title=row.title,
-            description=row.description,
-            unlocked_at=row.created_at
-        )
-        for row in achievements_rows
-    ]
+    summary = summary_rows[0]
+    total_attempts = summary.total_attempts or 0
+    correct_attempts = summary.correct_attempts or 0
+    unique_solved = summary.unique_solved or 0
+
+    # Пользователь ещё ничего не решал (частый случай для новых) -
+    # готовый пустой ответ, без сборки моделей и сериализации
+    if total_attempts == 0:
+        return _EMPTY_STATS
 
-    # === 8. Формирование ответа ===
+    # === 6. Расчёт точности ===
+    accuracy = (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0.0
+
+    # Списки валидируются одним вызовом TypeAdapter (пакетно, в pydantic-core),
+    # а не конструктором модели на каждую строку
+    recent_activity = _RECENT_ACTIVITY_ADAPTER.validate_python([
+        {
+            "task_id": attempt.task_id,
+            "task_title": attempt.task.title,
+            "task_difficulty": attempt.task.difficulty,
+            "is_correct": attempt.is_correct,
+            "created_at": attempt.created_at,
+        }
+        for attempt in recent_attempts
+    ])
+    # Строки достижений уже с именами полей схемы - валидируются напрямую
+    achievements = _ACHIEVEMENTS_ADAPTER.validate_python(
+        achievements_rows, from_attributes=True
+    )
+
+    # === 7. Формирование ответа ===
     return UserStatsResponse(
         total_attempts=total_attempts,
         correct_attempts=correct_attempts,
         accuracy=round(accuracy, 2),  # Округлить до 2 знаков
         unique_solved=unique_solved,
-        by_difficulty=by_difficulty,
+        by_difficulty=summary.by_difficulty or [],  # dict'ы валидируются в DifficultyStats
         recent_activity=recent_activity,
         achievements=achievements
     )
 
 
+@router.get(
+    "/me/stats",
+    response_model=UserStatsResponse,
+    summary="Получить статистику текущего пользователя",
+    description=(
+        "Возвращает полную статистику по решению задач для авторизованного пользователя. "
+        "Включает общее количество попыток, точность, статистику по сложности, "
+        "последнюю активность и полученные достижения."
+    )
+)
+async def get_user_stats(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    """
+    Получение статистики пользователя.
+
+    Требует JWT аутентификации.
+    Возвращает только статистику текущего пользователя (безопасность).
+    Ответ отдаётся с ETag и Cache-Control: private: повторный опрос с
+    If-None-Match получает 304 Not Modified без тела.
+
+    Args:
+        request: Запрос (для заголовка If-None-Match)
+        current_user: Текущий авторизованный пользователь (из JWT токена)
+
+    Returns:
+        UserStatsResponse: Полная статистика пользователя
+    """
+
+    user_id = current_user.id
+
+    # Готовый сериализованный ответ из кэша (сбрасывается при новой попытке решения)
+    cached = user_stats_cache.get(user_id)
+    if cached is None:
+        stats = await _compute_user_stats(current_user.id)
+        cached = user_stats_cache[user_id] = (
+            _EMPTY_STATS_RENDERED if stats is _EMPTY_STATS else _render_stats(stats)
+        )
+
+    body, etag = cached
+    return _conditional_stats_response(request, body, etag)
+
+
 # ============================================================================
 # История PvP матчей
 # ============================================================================
@@ -229,13 +335,15 @@ async def get_my_matches(
     ),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> PaginatedMatchHistoryResponse:
+) -> PydanticResponse:
     """
     Получение истории PvP матчей текущего пользователя.
 
     Query параметры позволяют фильтровать и сортировать результаты.
+    Страница уже собрана сервисом как PaginatedMatchHistoryResponse и
+    сериализуется один раз в pydantic-core.
     """
-    return await get_match_history(
+    history = await get_match_history(
         user_id=current_user.id,
         page=page,
         per_page=per_page,
@@ -246,6 +354,7 @@ async def get_my_matches(
         order=order,
         session=db,
     )
+    return PydanticResponse(history)
 
 
 @router.get(
@@ -260,9 +369,10 @@ async def get_my_matches(
     tags=["match-history"],
 )
 async def get_my_match_stats(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> MatchStatsResponse:
+) -> Response:
     """
     Получение детальной статистики по PvP матчам с сериями побед и анализом тем.
 
@@ -271,8 +381,18 @@ async def get_my_match_stats(
     - Текущую серию побед/поражений
     - Лучшую серию побед за всё время
     - Сильные и слабые темы (топ-3 с минимум 3 попытками)
+
+    Ответ кэшируется до завершения следующего матча пользователя
+    (не дольше USER_STATS_CACHE_TTL_SECONDS) и отдаётся с ETag:
+    повторный опрос с If-None-Match получает 304 Not Modified.
     """
-    return await get_detailed_match_stats(current_user.id, db)
+    cached = match_stats_cache.get(current_user.id)
+    if cached is None:
+        stats = await get_detailed_match_stats(current_user.id, db)
+        cached = match_stats_cache[current_user.id] = _render_stats(stats)
+
+    body, etag = cached
+    return _conditional_stats_response(request, body, etag)
 
 
 @router.get(
@@ -294,32 +414,20 @@ async def get_my_match_detail(
     match_id: int,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> MatchDetailResponse:
+) -> PydanticResponse:
     """
     Получение деталей конкретного матча.
 
     Требует проверки что пользователь является участником (player1 или player2).
     """
 
-    # Проверить что матч существует и пользователь его участник
-    result = await db.execute(
-        select(Match).where(Match.id == match_id)
-    )
-    match = result.scalar_one_or_none()
-
-    if not match:
-        raise HTTPException(
-            status_code=404,
-            detail="Матч не найден"
-        )
-
-    if current_user.id not in (match.player1_id, match.player2_id):
-        raise HTTPException(
-            status_code=403,
-            detail="Доступ запрещён: вы не участник этого матча"
-        )
+    # Матч загружается одним запросом, участие проверяет сам сервис по
+    # загруженной строке (404/403) - отдельный SELECT для авторизации не нужен
+    detail = await get_match_detail(match_id, current_user.id, db)
 
-    return await get_match_detail(match_id, current_user.id, db)
+    # Ответ уже собран сервисом как MatchDetailResponse - сериализуем его один раз,
+    # без повторной валидации вложенного списка задач по response_model
+    return PydanticResponse(detail)
 
 
 # ============================================================================
@@ -1,17 +1,17 @@
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.task import (
-    TaskInList, TaskDetail, PaginatedTaskResponse, TaskCheckRequest, TaskCheckResponse,
+    TaskInList, TaskDetail, TaskCursor, PaginatedTaskResponse, TaskCheckRequest, TaskCheckResponse,
     TaskCreate, TaskUpdate, TaskAdminResponse, AdminPaginatedTaskResponse
 )
 from app.schemas.stats import UserStatsResponse, DifficultyStats, RecentActivityItem, AchievementItem
-from app.schemas.admin import AdminStatsResponse
+from app.schemas.admin import AdminStatsResponse, ImportJobResponse
 from app.schemas.match import MatchResponse, MatchDetailResponse, OpponentInfo, MatchTaskInfo, CancelResponse
 
 __all__ = [
     "UserCreate", "UserResponse",
-    "TaskInList", "TaskDetail", "PaginatedTaskResponse", "TaskCheckRequest", "TaskCheckResponse",
+    "TaskInList", "TaskDetail", "TaskCursor", "PaginatedTaskResponse", "TaskCheckRequest", "TaskCheckResponse",
     "TaskCreate", "TaskUpdate", "TaskAdminResponse", "AdminPaginatedTaskResponse",
     "UserStatsResponse", "DifficultyStats", "RecentActivityItem", "AchievementItem",
-    "AdminStatsResponse",
+    "AdminStatsResponse", "ImportJobResponse",
     "MatchResponse", "MatchDetailResponse", "OpponentInfo", "MatchTaskInfo", "CancelResponse"
 ]
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -50,3 +53,23 @@ class AdminStatsResponse(BaseModel):
             ]
         }
     )
+
+
+class ImportJobResponse(BaseModel):
+    """
+    Статус фонового импорта задач.
+
+    Возвращается эндпоинтом /api/admin/imports/{job_id}; клиент опрашивает его,
+    пока status не станет done или failed.
+    """
+
+    id: int
+    status: str = Field(..., description="pending, running, done или failed")
+    filename: Optional[str] = Field(None, description="Имя загруженного файла")
+    total: Optional[int] = Field(None, description="Количество задач в файле")
+    created: Optional[int] = Field(None, description="Количество добавленных задач")
+    error: Optional[str] = Field(None, description="Причина ошибки импорта")
+    created_at: datetime = Field(..., description="Время загрузки файла")
+    updated_at: datetime = Field(..., description="Время последнего изменения статуса")
+
+    model_config = ConfigDict(from_attributes=True)
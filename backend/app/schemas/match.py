@@ -116,12 +116,8 @@ class MatchDetailResponse(BaseModel):
                 rating=match.player2.rating,
             )
 
-        match_tasks: List[MatchTaskInfo] = []
-        if match.tasks:
-            match_tasks = [
-                MatchTaskInfo.from_match_task(mt)
-                for mt in sorted(match.tasks, key=lambda t: t.task_order)
-            ]
+        # match.tasks уже отсортированы по task_order (order_by у relationship)
+        match_tasks = [MatchTaskInfo.from_match_task(mt) for mt in match.tasks]
 
         return cls(
             match_id=match.id,
@@ -49,6 +49,18 @@ class TaskDetail(BaseModel):
 
 # === Схема для пагинированного списка задач ===
 
+class TaskCursor(BaseModel):
+    """
+    Курсор keyset-пагинации списка задач.
+
+    Значения передаются в query-параметрах after_created_at и after_id
+    следующего запроса, чтобы получить задачи после последней на странице.
+    """
+
+    after_created_at: datetime
+    after_id: int
+
+
 class PaginatedTaskResponse(BaseModel):
     """
     Схема ответа для списка задач с пагинацией.
@@ -58,10 +70,24 @@ class PaginatedTaskResponse(BaseModel):
     """
 
     items: List[TaskInList] = Field(..., description="Список задач на текущей странице")
-    total: int = Field(..., description="Общее количество задач (с учетом фильтров)")
+    total: Optional[int] = Field(
+        ...,
+        description=(
+            "Общее количество задач (с учетом фильтров); "
+            "None для страниц по курсору (after_created_at/after_id)"
+        ),
+    )
     page: int = Field(..., ge=1, description="Текущая страница")
     per_page: int = Field(..., ge=1, le=100, description="Количество задач на странице")
-    pages: int = Field(..., ge=0, description="Общее количество страниц")
+    pages: Optional[int] = Field(
+        ...,
+        ge=0,
+        description="Общее количество страниц (None для страниц по курсору)",
+    )
+    next_cursor: Optional[TaskCursor] = Field(
+        None,
+        description="Курсор следующей страницы (None, если страница последняя)",
+    )
 
     @field_validator('per_page')
     @classmethod
@@ -1,6 +1,6 @@
 """Pydantic схемы для WebSocket событий в PvP матчах."""
 
-from typing import Optional, List
+from typing import Literal, Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -12,7 +12,7 @@ from pydantic import BaseModel, Field
 class SubmitAnswerMessage(BaseModel):
     """Сообщение от клиента с ответом на задачу."""
 
-    type: str = Field("submit_answer", description="Тип события")
+    type: Literal["submit_answer"] = Field("submit_answer", description="Тип события")
     task_id: int = Field(..., description="ID задачи")
     answer: str = Field(..., description="Текст ответа")
 
@@ -20,7 +20,7 @@ class SubmitAnswerMessage(BaseModel):
 class PongMessage(BaseModel):
     """Pong ответ на heartbeat ping."""
 
-    type: str = Field("pong", description="Тип события")
+    type: Literal["pong"] = Field("pong", description="Тип события")
     timestamp: int = Field(..., description="Timestamp из ping сообщения")
 
 
@@ -16,7 +16,6 @@ Where:
 """
 
 import logging
-import math
 
 logger = logging.getLogger(__name__)
 
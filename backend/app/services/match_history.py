@@ -9,12 +9,14 @@ Service layer для работы с историей PvP матчей поль
 
 from math import ceil
 from typing import Optional
-from sqlalchemy import select, func, or_, and_, case, cast, literal
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, or_, and_, case, cast, literal, false
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-from sqlalchemy.types import Float, Numeric
+from sqlalchemy.orm import joinedload, noload, selectinload
+from sqlalchemy.types import Numeric
+from pydantic import TypeAdapter
 
-from app.models import Match, User, MatchTask, MatchAnswer, Task
+from app.models import Match, User, MatchTask, MatchAnswer, Task, MatchStatus
 from app.schemas.match_history import (
     MatchHistoryItem,
     PaginatedMatchHistoryResponse,
@@ -26,6 +28,10 @@ from app.schemas.match_history import (
     TopicStats,
 )
 
+# Пакетная валидация элементов страницы истории: адаптер (валидатор pydantic-core)
+# строится один раз при импорте, а не на каждый запрос
+_HISTORY_ITEMS_ADAPTER = TypeAdapter(list[MatchHistoryItem])
+
 
 # ============================================================================
 # GET /api/users/me/matches - История с пагинацией и фильтрами
@@ -74,8 +80,13 @@ async def get_match_history(
     )
 
     # Фильтр по статусу
+    # Статус хранится кодом (SMALLINT): неизвестное значение не во что перевести,
+    # поэтому такой фильтр сразу даёт пустую выборку
     if status and status != "all":
-        query = query.where(Match.status == status)
+        if status in {s.value for s in MatchStatus}:
+            query = query.where(Match.status == status)
+        else:
+            query = query.where(false())
 
     # Фильтр по результату (won/lost/draw)
     if result and result != "all":
@@ -132,8 +143,11 @@ async def get_match_history(
     result_obj = await session.execute(query)
     matches = result_obj.scalars().unique().all()
 
-    # Конвертация ORM объектов в Pydantic models
-    items = [_build_history_item(match, user_id) for match in matches]
+    # Конвертация ORM объектов в Pydantic models: dict'ы строк валидируются
+    # одним вызовом адаптера вместо конструктора модели на каждый матч
+    items = _HISTORY_ITEMS_ADAPTER.validate_python(
+        [_build_history_item(match, user_id) for match in matches]
+    )
 
     # Расчёт количества страниц
     pages = ceil(total / per_page) if total > 0 else 0
@@ -147,9 +161,9 @@ async def get_match_history(
     )
 
 
-def _build_history_item(match: Match, user_id: int) -> MatchHistoryItem:
+def _build_history_item(match: Match, user_id: int) -> dict:
     """
-    Построить MatchHistoryItem из Match ORM объекта.
+    Построить данные MatchHistoryItem (dict) из Match ORM объекта.
 
     Определяет:
     - Кто соперник (player1 или player2)
@@ -179,21 +193,21 @@ def _build_history_item(match: Match, user_id: int) -> MatchHistoryItem:
     elif match.status == "finished" and not match.winner_id:
         result = "draw"
 
-    return MatchHistoryItem(
-        match_id=match.id,
-        status=match.status,
-        result=result,
-        opponent=OpponentInfo(
-            id=opponent.id,
-            username=opponent.username,
-            rating=opponent.rating,
-        ),
-        my_score=my_score,
-        opponent_score=opponent_score,
-        my_rating_change=my_rating_change,
-        finished_at=match.finished_at,
-        created_at=match.created_at,
-    )
+    return {
+        "match_id": match.id,
+        "status": match.status,
+        "result": result,
+        "opponent": {
+            "id": opponent.id,
+            "username": opponent.username,
+            "rating": opponent.rating,
+        },
+        "my_score": my_score,
+        "opponent_score": opponent_score,
+        "my_rating_change": my_rating_change,
+        "finished_at": match.finished_at,
+        "created_at": match.created_at,
+    }
 
 
 # ============================================================================
@@ -213,23 +227,47 @@ async def get_match_detail(
     - Список задач с информацией о решениях
     - Времена отправки ответов
 
-    Предполагает, что user_id уже проверен (участник матча).
+    Проверка участия выполняется здесь же, по уже загруженному матчу,
+    без отдельного запроса.
+
+    Raises:
+        HTTPException 404: матч не найден
+        HTTPException 403: user_id не участник матча
     """
 
-    # Получить матч с загруженными relationships
+    # Получить матч с загруженными relationships: игроки - JOIN, задачи и ответы -
+    # по одному IN-query (коллекции через JOIN размножали бы строку матча)
     result = await session.execute(
         select(Match)
         .where(Match.id == match_id)
         .options(
             joinedload(Match.player1),
             joinedload(Match.player2),
-            joinedload(Match.tasks).joinedload(MatchTask.task),
+            noload(Match.winner),
+            selectinload(Match.tasks).options(
+                joinedload(MatchTask.task),
+                noload(MatchTask.match),
+            ),
+            selectinload(Match.answers).options(
+                noload(MatchAnswer.match),
+                noload(MatchAnswer.user),
+                noload(MatchAnswer.task),
+            ),
         )
     )
     match = result.scalar_one_or_none()
 
     if not match:
-        raise ValueError(f"Матч {match_id} не найден")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Матч не найден"
+        )
+
+    if user_id not in (match.player1_id, match.player2_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещён: вы не участник этого матча"
+        )
 
     # Определить соперника
     if match.player1_id == user_id:
@@ -252,31 +290,15 @@ async def get_match_detail(
     elif match.status == "finished" and not match.winner_id:
         result_str = "draw"
 
+    # Ответы обоих игроков уже загружены вместе с матчем -
+    # раскладываем по (user_id, task_id) вместо двух запросов на каждую задачу
+    answers = {(a.user_id, a.task_id): a for a in match.answers}
+
     # Получить информацию о решениях для каждой задачи
     tasks_info = []
-    for match_task in sorted(match.tasks, key=lambda t: t.task_order):
-        # Получить ответы обоих игроков на эту задачу
-        my_answer_result = await session.execute(
-            select(MatchAnswer).where(
-                and_(
-                    MatchAnswer.match_id == match_id,
-                    MatchAnswer.user_id == user_id,
-                    MatchAnswer.task_id == match_task.task_id,
-                )
-            )
-        )
-        my_answer = my_answer_result.scalar_one_or_none()
-
-        opponent_answer_result = await session.execute(
-            select(MatchAnswer).where(
-                and_(
-                    MatchAnswer.match_id == match_id,
-                    MatchAnswer.user_id == opponent.id,
-                    MatchAnswer.task_id == match_task.task_id,
-                )
-            )
-        )
-        opponent_answer = opponent_answer_result.scalar_one_or_none()
+    for match_task in match.tasks:  # уже по task_order (order_by у Match.tasks)
+        my_answer = answers.get((user_id, match_task.task_id))
+        opponent_answer = answers.get((opponent.id, match_task.task_id))
 
         tasks_info.append(
             TaskSolutionInfo(
@@ -1,17 +1,20 @@
 """Бизнес-логика для обработки ответов и завершения PvP матчей."""
 
 import logging
-from datetime import datetime, timezone
+from datetime import datetime
 
-from sqlalchemy import func, select
+from sqlalchemy import func, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import noload
 
+from app.database import run_after_commit
 from app.models.match import Match, MatchAnswer, MatchTask
-from app.models.task import Task
+from app.models.task import Task, normalize_answer_sql
 from app.models.user import User
 from app.models.enums import MatchStatus
 from app.services.elo import calculate_match_rating_changes, apply_rating_bounds
+from app.services.user_cache import invalidate_cached_user
+from app.services.user_stats import invalidate_user_stats
 
 logger = logging.getLogger(__name__)
 
@@ -56,22 +59,23 @@ async def process_answer(
     if not match:
         raise ValueError(f"Match {match_id} not found")
 
-    # 2. Получить правильный ответ задачи
+    # 2-3. Проверить ответ: нормализация и сравнение в PostgreSQL тем же
+    # выражением, что у колонки answer_normalized (как и в POST /api/tasks/{id}/check)
     result = await session.execute(
-        select(Task).where(Task.id == task_id)
+        select(
+            Task.answer_normalized,
+            (Task.answer_normalized == normalize_answer_sql(literal(answer))).label("is_correct"),
+        ).where(Task.id == task_id)
     )
-    task = result.scalar_one_or_none()
+    task = result.first()
 
     if not task:
         raise ValueError(f"Task {task_id} not found")
 
-    # 3. Нормализовать ответы для сравнения
-    normalized_answer = answer.strip().lower()
-    normalized_correct = task.answer.strip().lower()
-    is_correct = normalized_answer == normalized_correct
+    is_correct = task.is_correct
 
     logger.info(
-        f"[ANSWER CHECK] Task {task_id}: user='{normalized_answer}' vs correct='{normalized_correct}' -> {is_correct}"
+        f"[ANSWER CHECK] Task {task_id}: user='{answer}' vs correct='{task.answer_normalized}' -> {is_correct}"
     )
 
     # 4. UPSERT MatchAnswer
@@ -408,6 +412,13 @@ async def finalize_match(
 
         await session.flush()
 
+        # Рейтинги изменились - сбрасываем закэшированных пользователей и их
+        # статистику, чтобы /me, поиск матча и /me/matches/stats не показывали старое.
+        # Кэши сбрасываются после commit() вызывающего кода, иначе параллельный
+        # запрос закэширует данные матча до фиксации заново
+        run_after_commit(session, invalidate_cached_user, player1.id, player2.id)
+        run_after_commit(session, invalidate_user_stats, player1.id, player2.id)
+
         logger.info(
             f"Ratings updated - Player1: {old_rating_1}->{new_rating_1} ({player1_change:+d}), "
             f"Player2: {old_rating_2}->{new_rating_2} ({player2_change:+d})"
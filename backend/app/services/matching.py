@@ -48,23 +48,21 @@ async def find_or_create_match(
         1. Guard: проверяем что у пользователя нет текущего ACTIVE матча.
            Если есть WAITING матч -- пытаемся найти соперника (решает race condition
            когда оба игрока создают WAITING матчи одновременно).
-        2. FOR UPDATE SELECT: ищем waiting-матч в диапазоне рейтингов ±200.
-           Блокируем найденную строку чтобы никто другой не смог её забрать.
+        2. FOR UPDATE SKIP LOCKED SELECT: ищем waiting-матч в диапазоне рейтингов ±200.
+           Блокируем найденную строку чтобы никто другой не смог её забрать;
+           строки, уже заблокированные другими поисками, пропускаем.
         3a. Если найдена строка: присваиваем player2_id, status=active, flush, выбираем задачи.
         3b. Если строка не найдена: создаём новый Match с player1_id=user_id, status=waiting
             (или возвращаем существующий WAITING если он уже есть).
 
     Возвращает:
         Match с заполненными колонками. Relationships НЕ загружены (использовался noload).
-        Роутер должен после commit() сделать свежий SELECT для загрузки relationships.
 
     Raises:
         HTTPException 409: Если пользователь уже в ACTIVE матче.
 
     НЕ вызывает commit(). Роутер ответственен за commit.
     """
-    from fastapi import HTTPException
-
     logger.debug(f"find_or_create_match: user_id={user_id}, rating={user_rating}")
 
     # ------------------------------------------------------------------
@@ -128,7 +126,10 @@ async def find_or_create_match(
         )
         .order_by(Match.created_at.asc())   # FIFO: самый старый waiting-матч первый
         .limit(1)
-        .with_for_update(of=[Match])
+        # SKIP LOCKED: одновременные поиски не выстраиваются в очередь за одной
+        # строкой - каждый берёт следующий незаблокированный waiting-матч
+        # (или создаёт свой, который сольётся с чужим при следующем поиске, шаг 1)
+        .with_for_update(of=[Match], skip_locked=True)
     )
     try:
         lock_result = await session.execute(lock_stmt)
@@ -259,51 +260,39 @@ async def cancel_waiting_match(
     Удаляет waiting-матч пользователя.
 
     Алгоритм:
-        1. FOR UPDATE SELECT: находим waiting-матч где player1_id == user_id
-           и player2_id IS NULL. Блокируем строку.
-        2. Проверяем что блокировка успешна и условия не изменились
-           (кто-то мог забрать матч пока мы шли к блокировке).
-        3. DELETE.
+        DELETE ... WHERE player1_id = user_id AND player2_id IS NULL
+        AND status = 'waiting' RETURNING id -- один round-trip.
+
+        Гонка с find_or_create_match решается самим DELETE: если соперник уже
+        заблокировал строку (FOR UPDATE), DELETE ждёт его commit и перепроверяет
+        WHERE по новой версии строки -- забранный матч (player2_id задан,
+        status=active) уже не подходит и не удаляется.
 
     Возвращает:
         match_id удалённого матча, или None если нет матча для удаления.
 
     НЕ вызывает commit().
     """
-    # FOR UPDATE: блокируем строку перед DELETE чтобы не удалить матч
-    # который другой пользователь уже забрал (race condition с find_or_create_match)
-    lock_stmt = (
-        select(Match)
-        .options(
-            noload(Match.player1),
-            noload(Match.player2),
-            noload(Match.winner),
-            noload(Match.tasks),
-            noload(Match.answers),
-        )
+    # Waiting-матч не имеет child rows (tasks добавляются только при переходе в active);
+    # поиск строки идёт по индексу ix_matches_player1_status
+    delete_stmt = (
+        delete(Match)
         .where(
             Match.player1_id == user_id,
             Match.player2_id.is_(None),
             Match.status == MatchStatus.WAITING,
         )
-        .with_for_update(of=[Match])
-        .limit(1)
+        .returning(Match.id)
+        .execution_options(synchronize_session=False)
     )
-    lock_result = await session.execute(lock_stmt)
-    match = lock_result.scalar_one_or_none()
+    match_id = (await session.execute(delete_stmt)).scalars().first()
 
-    if match is None:
+    if match_id is None:
         logger.debug(
             f"Cancel attempt by user {user_id}: no WAITING match found to cancel"
         )
         return None
 
-    match_id = match.id
-
-    # DELETE через ORM: session.delete() безопасен.
-    # Waiting-матч не имеет child rows (tasks добавляются только при переходе в active).
-    await session.delete(match)
-
     logger.info(
         f"MATCH CANCELLED: user={user_id} cancelled WAITING match {match_id}"
     )
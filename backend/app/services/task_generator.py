@@ -8,10 +8,20 @@
 import logging
 import random
 import re
+from functools import lru_cache
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Паттерн для поиска {{...}} (компилируется один раз при импорте)
+TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+
+
+@lru_cache(maxsize=256)
+def _compile_expression(expression: str):
+    """Компилирует выражение {{eval:...}} один раз на все вариации шаблона."""
+    return compile(expression, "<template>", "eval")
+
 
 class TaskGenerator:
     """
@@ -66,7 +76,7 @@ class TaskGenerator:
                 expression = content[5:]
                 try:
                     # Безопасное вычисление с доступом только к params
-                    result = eval(expression, {"__builtins__": {}}, params)
+                    result = eval(_compile_expression(expression), {"__builtins__": {}}, params)
                     # Округляем до 2 знаков для float, целое для int
                     if isinstance(result, float):
                         return str(round(result, 2))
@@ -127,22 +137,22 @@ class TaskGenerator:
 
             return full_match
 
-        # Паттерн для поиска {{...}}
-        pattern = re.compile(r"\{\{([^}]+)\}\}")
-
         # Создаём копию шаблона
         result = template.copy()
 
         # Обрабатываем каждое поле
         for key, value in result.items():
             if isinstance(value, str):
-                # Заменяем шаблоны в строках
-                result[key] = pattern.sub(replace_param, value)
+                # Заменяем шаблоны в строках (без "{{" строка остаётся как есть)
+                if "{{" in value:
+                    result[key] = TEMPLATE_PATTERN.sub(replace_param, value)
 
             elif isinstance(value, list):
                 # Обрабатываем списки (hints)
                 result[key] = [
-                    pattern.sub(replace_param, item) if isinstance(item, str) else item
+                    TEMPLATE_PATTERN.sub(replace_param, item)
+                    if isinstance(item, str) and "{{" in item
+                    else item
                     for item in value
                 ]
 
@@ -175,11 +185,12 @@ class TaskGenerator:
             return False
 
         # Проверяем что есть хотя бы один параметр или eval
-        pattern = re.compile(r"\{\{([^}]+)\}\}")
+        # (быстрая проверка подстроки "{{" до запуска регулярного выражения)
         has_templates = False
 
         for key in ["text", "answer"]:
-            if pattern.search(str(template.get(key, ""))):
+            value = str(template.get(key, ""))
+            if "{{" in value and TEMPLATE_PATTERN.search(value):
                 has_templates = True
                 break
 
@@ -0,0 +1,67 @@
+"""
+Кэш пользователей по id в памяти процесса (используется get_current_user).
+
+Основные функции:
+- get_cached_user() - пользователь из кэша без запроса к БД
+- cache_user() - положить снимок загруженного пользователя в кэш
+- invalidate_cached_user() - сбросить пользователей после изменения их данных
+"""
+
+from types import MappingProxyType
+
+from cachetools import TTLCache
+from sqlalchemy import inspect
+
+from app.models import User
+
+
+# Время жизни кэша текущего пользователя (секунды): изменения роли/рейтинга
+# видны в get_current_user с задержкой не больше этого значения.
+# Кэш у каждого gunicorn worker'а свой: invalidate_cached_user() сбрасывает
+# его только в процессе, где произошло изменение, остальные отстают до TTL
+CURRENT_USER_CACHE_TTL_SECONDS = 10
+
+# Колонки User, которые сохраняются в кэше
+_USER_COLUMN_KEYS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+# Кэш снимков User по id: неизменяемые словари значений колонок, а не
+# ORM-объекты - объект привязан к сессии запроса, и её rollback/закрытие
+# сделали бы закэшированный экземпляр непригодным для следующих запросов
+_current_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=CURRENT_USER_CACHE_TTL_SECONDS)
+
+
+def get_cached_user(user_id: int) -> User | None:
+    """
+    Пользователь из кэша get_current_user, если он там есть (иначе None).
+
+    Каждый вызов возвращает новый transient User (не привязан ни к одной
+    сессии), собранный из снимка колонок. Объект только для чтения: добавлять
+    его в сессию нельзя.
+    """
+    snapshot = _current_user_cache.get(user_id)
+    if snapshot is None:
+        return None
+    return User(**snapshot)
+
+
+def cache_user(user: User) -> User:
+    """
+    Кладёт в кэш снимок колонок только что загруженного из БД пользователя.
+
+    Вызывается сразу после загрузки, пока атрибуты не истекли (до commit/rollback).
+    Возвращает transient User из этого снимка - как и get_cached_user().
+    """
+    snapshot = MappingProxyType({key: getattr(user, key) for key in _USER_COLUMN_KEYS})
+    _current_user_cache[user.id] = snapshot
+    return User(**snapshot)
+
+
+def invalidate_cached_user(*user_ids: int) -> None:
+    """
+    Убирает пользователей из кэша (после изменения рейтинга и т.п.).
+
+    Вызывается после commit(): иначе параллельный запрос может успеть
+    закэшировать данные из БД до фиксации изменений.
+    """
+    for user_id in user_ids:
+        _current_user_cache.pop(user_id, None)
@@ -0,0 +1,32 @@
+"""
+Service layer для кэша статистики пользователя (/api/users/me/stats, /me/matches/stats).
+
+Основные функции:
+- invalidate_user_stats() - сбросить закэшированные ответы /me/stats и /me/matches/stats
+"""
+
+from cachetools import TTLCache
+
+# Время жизни закэшированных ответов /me/stats и /me/matches/stats (секунды)
+USER_STATS_CACHE_TTL_SECONDS = 30
+
+# Кэши готовых ответов в памяти процесса, ключ - user_id. Сбрасываются
+# invalidate_user_stats() после commit() новой попытки решения, завершения матча
+# и удаления задачи. Кэш у каждого gunicorn worker'а свой: сброс доходит только
+# до процесса, обработавшего изменение, поэтому другие worker'ы могут отдавать
+# прежнюю статистику до USER_STATS_CACHE_TTL_SECONDS (столько же живёт и
+# Cache-Control: max-age ответа в браузере)
+user_stats_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_STATS_CACHE_TTL_SECONDS)
+match_stats_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_STATS_CACHE_TTL_SECONDS)
+
+
+def invalidate_user_stats(*user_ids: int) -> None:
+    """
+    Удаляет закэшированную статистику пользователей (после изменения их данных).
+
+    Вызывается после commit(), иначе параллельный запрос может успеть
+    закэшировать статистику до фиксации изменений.
+    """
+    for user_id in user_ids:
+        user_stats_cache.pop(user_id, None)
+        match_stats_cache.pop(user_id, None)
@@ -1,4 +1,10 @@
+import hashlib
+import os
+import time
+
+import anyio
 import bcrypt
+from cachetools import TTLCache
 from datetime import datetime, timedelta, timezone
 
 from jose import jwt, JWTError, ExpiredSignatureError
@@ -47,6 +53,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+# Ограничение числа одновременных bcrypt-операций в пуле потоков:
+# не больше, чем ядер CPU, чтобы хеширование не вытесняло остальные задачи пула
+_bcrypt_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Асинхронная версия hash_password для endpoint'ов.
+
+    bcrypt намеренно медленный (десятки-сотни мс CPU), поэтому хеширование
+    выполняется в пуле потоков и не блокирует event loop.
+    """
+    return await anyio.to_thread.run_sync(hash_password, password, limiter=_bcrypt_limiter)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Асинхронная версия verify_password для endpoint'ов (в пуле потоков).
+    """
+    return await anyio.to_thread.run_sync(
+        verify_password, plain_password, hashed_password, limiter=_bcrypt_limiter
+    )
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """
     Создает JWT access токен с заданными данными и временем жизни.
@@ -136,3 +166,31 @@ def verify_token(token: str) -> dict:
             detail="Не авторизован",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+# Кэш расшифрованных payload'ов JWT: ключ - sha256 токена (сам токен в памяти
+# кэша не хранится), запись живёт не дольше TOKEN_CACHE_TTL_SECONDS
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_payload_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+
+def verify_token_cached(token: str) -> dict:
+    """
+    verify_token с кэшированием результата для повторяющихся токенов.
+
+    Один и тот же токен приходит на каждый запрос пользователя, поэтому
+    проверка подписи выполняется не чаще раза в TOKEN_CACHE_TTL_SECONDS.
+    Срок действия (exp) проверяется и при попадании в кэш.
+
+    Raises:
+        HTTPException 401: Если токен истек или невалиден (как verify_token)
+    """
+    key = hashlib.sha256(token.encode()).digest()
+
+    payload = _token_payload_cache.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    payload = verify_token(token)
+    _token_payload_cache[key] = payload
+    return payload
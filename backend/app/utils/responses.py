@@ -0,0 +1,15 @@
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class PydanticResponse(JSONResponse):
+    """
+    JSON-ответ из уже собранной pydantic-модели.
+
+    Модель сериализуется один раз в pydantic-core (model_dump_json), без
+    jsonable_encoder и без повторной валидации по response_model эндпоинта.
+    response_model в декораторе оставляется - он описывает ответ в OpenAPI.
+    """
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.model_dump_json().encode()
@@ -1,15 +1,16 @@
 """WebSocket роутер для real-time PvP матчей."""
 
 import asyncio
-import json
 import logging
 import secrets
 import time
-from datetime import datetime, timezone
+from datetime import datetime
+from typing import Annotated, Union
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, WebSocketException, status, Query
+from pydantic import Field, TypeAdapter, ValidationError
 from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, noload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session_maker
@@ -21,7 +22,6 @@ from app.services.match_logic import (
     process_answer,
     check_match_completion,
     finalize_match,
-    finalize_match_forfeit,
     handle_technical_error,
     get_match_state,
     activate_match,
@@ -29,8 +29,6 @@ from app.services.match_logic import (
 from app.config import settings
 from app.websocket.manager import manager
 from app.schemas.websocket import (
-    SubmitAnswerMessage,
-    PongMessage,
     PlayerJoinedEvent,
     MatchStartEvent,
     AnswerResultEvent,
@@ -38,16 +36,35 @@ from app.schemas.websocket import (
     MatchEndEvent,
     OpponentDisconnectedEvent,
     OpponentReconnectedEvent,
-    DisconnectWarningEvent,
     ReconnectionSuccessEvent,
     ErrorEvent,
     PingEvent,
     TaskInfo,
     PlayerInfo,
+    PongMessage,
+    SubmitAnswerMessage,
 )
 
 logger = logging.getLogger(__name__)
 
+# Входящие сообщения клиента; конкретная модель выбирается по полю type
+ClientMessage = Annotated[
+    Union[SubmitAnswerMessage, PongMessage],
+    Field(discriminator="type"),
+]
+_CLIENT_MESSAGE_ADAPTER = TypeAdapter(ClientMessage)
+
+
+def _invalid_message_error(error: ValidationError) -> ErrorEvent:
+    """Ошибка для клиента по неразобранному кадру: неизвестный type или неверные поля."""
+    first = error.errors()[0]
+    if first["type"] == "union_tag_invalid":
+        return ErrorEvent(
+            message=f"Unknown message type: {first['input'].get('type')}",
+            code="UNKNOWN_TYPE",
+        )
+    return ErrorEvent(message="Invalid message", code="INVALID_MESSAGE")
+
 router = APIRouter(prefix="/api/pvp", tags=["pvp-websocket"])
 
 # Heartbeat settings
@@ -155,9 +172,9 @@ async def load_match_with_tasks(
     result = await session.execute(
         select(Match)
         .where(Match.id == match_id)
-        .options(joinedload(Match.tasks))
+        .options(selectinload(Match.tasks).joinedload(MatchTask.task))
     )
-    match = result.unique().scalar_one_or_none()
+    match = result.scalar_one_or_none()
 
     if not match:
         return None, []
@@ -165,7 +182,7 @@ async def load_match_with_tasks(
     # Преобразовать MatchTask в TaskInfo
     tasks_info = []
     for match_task in match.tasks:
-        # Загрузить задачу (она загружается через lazy="joined" в MatchTask)
+        # Задача уже загружена вместе с матчем (joinedload(MatchTask.task))
         task = match_task.task
         tasks_info.append(
             TaskInfo(
@@ -255,7 +272,7 @@ async def cleanup_orphaned_match(
 async def handle_message(
     match_id: int,
     user_id: int,
-    message: dict,
+    message: ClientMessage,
 ) -> None:
     """
     Обработчик входящих сообщений от клиента.
@@ -263,31 +280,18 @@ async def handle_message(
     Args:
         match_id: ID матча
         user_id: ID пользователя
-        message: Словарь сообщения
+        message: Уже провалидированное сообщение (см. _CLIENT_MESSAGE_ADAPTER)
     """
-    message_type = message.get("type")
-
-    if message_type == "pong":
+    if isinstance(message, PongMessage):
         # Heartbeat response -- ничего не делаем
         logger.debug(f"Received pong from user {user_id}")
         return
 
-    elif message_type == "submit_answer":
-        task_id = message.get("task_id")
-        answer = message.get("answer")
+    elif isinstance(message, SubmitAnswerMessage):
+        task_id = message.task_id
+        answer = message.answer
 
-        logger.info(f"[ANSWER] User {user_id} submitted answer for task {task_id}: '{answer}' (type={type(answer).__name__}, len={len(str(answer)) if answer is not None else 0})")
-
-        if not task_id or answer is None:
-            await manager.send_personal(
-                match_id,
-                user_id,
-                ErrorEvent(
-                    message="Missing task_id or answer",
-                    code="INVALID_MESSAGE",
-                ).model_dump(),
-            )
-            return
+        logger.info(f"[ANSWER] User {user_id} submitted answer for task {task_id}: '{answer}' (len={len(answer)})")
 
         # CHECK RATE LIMIT: Max 1 answer per second per user
         is_allowed, wait_time = manager.check_rate_limit(match_id, user_id)
@@ -449,17 +453,6 @@ async def handle_message(
                     ).model_dump(),
                 )
 
-    else:
-        # Unknown message type
-        await manager.send_personal(
-            match_id,
-            user_id,
-            ErrorEvent(
-                message=f"Unknown message type: {message_type}",
-                code="UNKNOWN_TYPE",
-            ).model_dump(),
-        )
-
 
 async def heartbeat_task(
     match_id: int,
@@ -709,10 +702,20 @@ async def websocket_endpoint(
         # 8. Enter message loop
         while True:
             raw_data = await websocket.receive_text()
-            message = json.loads(raw_data)
+            # Разбор JSON и валидация за один проход в pydantic-core,
+            # без промежуточного dict
+            try:
+                message = _CLIENT_MESSAGE_ADAPTER.validate_json(raw_data)
+            except ValidationError as e:
+                await manager.send_personal(
+                    match_id,
+                    user.id,
+                    _invalid_message_error(e).model_dump(),
+                )
+                continue
 
             # Update last_pong on any message (resets timeout)
-            if message.get("type") == "pong":
+            if isinstance(message, PongMessage):
                 last_pong["time"] = time.time()
 
             # Handle message
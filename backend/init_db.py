@@ -8,10 +8,11 @@ import json
 import logging
 from pathlib import Path
 
-from sqlalchemy import select, func, delete, text
+from sqlalchemy import select, func, delete, text, inspect
 
 from app.database import async_session_maker, init_db, async_engine
-from app.models import Task, User
+from app.models import Base, Task, User
+from app.models.match import MATCH_STATUS_CODES
 from app.utils.auth import hash_password
 
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +37,189 @@ async def wait_for_db(max_retries: int = 30) -> bool:
     return False
 
 
+async def migrate_match_status_column() -> None:
+    """
+    Одноразовая миграция matches.status: VARCHAR ('waiting', ...) -> SMALLINT.
+
+    Идемпотентна: если таблицы ещё нет или колонка уже SMALLINT, ничего не делает.
+    """
+    try:
+        async with async_engine.begin() as conn:
+            result = await conn.execute(text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'matches' AND column_name = 'status'"
+            ))
+            data_type = result.scalar()
+            if data_type is None or data_type == "smallint":
+                return
+
+            cases = " ".join(
+                f"WHEN '{status.value}' THEN {code}"
+                for status, code in MATCH_STATUS_CODES.items()
+            )
+            await conn.execute(text("ALTER TABLE matches ALTER COLUMN status DROP DEFAULT"))
+            await conn.execute(text(
+                "ALTER TABLE matches ALTER COLUMN status TYPE smallint "
+                f"USING (CASE status {cases} END)"
+            ))
+            await conn.execute(text("ALTER TABLE matches ALTER COLUMN status SET DEFAULT 0"))
+            logger.info("✓ matches.status переведён в SMALLINT")
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка миграции matches.status: {e}")
+
+
+async def migrate_task_hints_column() -> None:
+    """
+    Одноразовая миграция tasks.hints: JSONB -> JSON.
+
+    Идемпотентна: если таблицы ещё нет или колонка уже JSON, ничего не делает.
+    """
+    try:
+        async with async_engine.begin() as conn:
+            result = await conn.execute(text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'tasks' AND column_name = 'hints'"
+            ))
+            if result.scalar() != "jsonb":
+                return
+
+            await conn.execute(text(
+                "ALTER TABLE tasks ALTER COLUMN hints TYPE json USING hints::json"
+            ))
+            logger.info("✓ tasks.hints переведён в JSON")
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка миграции tasks.hints: {e}")
+
+
+async def migrate_task_answer_normalized_column() -> None:
+    """
+    Добавляет генерируемую колонку tasks.answer_normalized (lower(btrim(answer))).
+
+    Для существующих строк PostgreSQL заполняет колонку сам при ALTER TABLE.
+    Идемпотентна: если таблицы ещё нет или колонка уже есть, ничего не делает.
+    """
+    try:
+        async with async_engine.begin() as conn:
+            result = await conn.execute(text(
+                "SELECT to_regclass('tasks') IS NOT NULL"
+            ))
+            if not result.scalar():
+                return
+
+            await conn.execute(text(
+                "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS answer_normalized TEXT "
+                "GENERATED ALWAYS AS (lower(btrim(answer, E' \\t\\r\\n'))) STORED"
+            ))
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка миграции tasks.answer_normalized: {e}")
+
+
+# Индексы, которые были заменены другими в моделях и удаляются из существующих БД
+OBSOLETE_INDEXES = (
+    "ix_tasks_created_desc",  # заменён на ix_tasks_created_id_desc
+    "ix_user_task_attempts_user_correct",  # заменён на ix_uta_user_correct_task
+    "ix_user_task_attempts_user_created",  # заменён на ix_uta_user_created
+)
+
+
+async def drop_obsolete_indexes() -> None:
+    """Удаляет индексы из OBSOLETE_INDEXES. Идемпотентна (DROP INDEX IF EXISTS)."""
+    try:
+        async with async_engine.begin() as conn:
+            for index_name in OBSOLETE_INDEXES:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка удаления устаревших индексов: {e}")
+
+
+# Счётчики попыток в users (см. User.total_attempts) и их пересчёт из user_task_attempts
+USER_COUNTER_COLUMNS = ("total_attempts", "correct_attempts", "unique_solved")
+
+
+async def migrate_user_counter_columns() -> None:
+    """
+    Добавляет в users счётчики попыток и заполняет их по истории попыток.
+
+    Идемпотентна: если таблицы ещё нет или колонки уже есть, ничего не делает.
+    """
+    try:
+        async with async_engine.begin() as conn:
+            result = await conn.execute(text("SELECT to_regclass('users') IS NOT NULL"))
+            if not result.scalar():
+                return
+
+            result = await conn.execute(text(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE table_name = 'users' AND column_name = ANY(:columns)"
+            ), {"columns": list(USER_COUNTER_COLUMNS)})
+            if result.scalar() == len(USER_COUNTER_COLUMNS):
+                return
+
+            for column_name in USER_COUNTER_COLUMNS:
+                await conn.execute(text(
+                    f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {column_name} "
+                    "INTEGER NOT NULL DEFAULT 0"
+                ))
+
+            result = await conn.execute(text(
+                "SELECT to_regclass('user_task_attempts') IS NOT NULL"
+            ))
+            if result.scalar():
+                await conn.execute(text(
+                    "UPDATE users u SET "
+                    "total_attempts = s.total_attempts, "
+                    "correct_attempts = s.correct_attempts, "
+                    "unique_solved = s.unique_solved "
+                    "FROM ("
+                    "  SELECT user_id, "
+                    "         count(*) AS total_attempts, "
+                    "         count(*) FILTER (WHERE is_correct) AS correct_attempts, "
+                    "         count(DISTINCT task_id) FILTER (WHERE is_correct) AS unique_solved "
+                    "  FROM user_task_attempts GROUP BY user_id"
+                    ") s "
+                    "WHERE s.user_id = u.id"
+                ))
+            logger.info("✓ Счётчики попыток добавлены в users")
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка миграции счётчиков users: {e}")
+
+
+async def create_missing_indexes() -> None:
+    """
+    Создаёт индексы из моделей, которых ещё нет в существующих таблицах.
+
+    create_all создаёт индексы только вместе с новой таблицей, поэтому индексы,
+    добавленные в модели позже, досоздаются здесь. Идемпотентна.
+    """
+
+    def _create(sync_conn) -> int:
+        inspector = inspect(sync_conn)
+        created = 0
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(sync_conn)
+                    created += 1
+        return created
+
+    try:
+        async with async_engine.begin() as conn:
+            created = await conn.run_sync(_create)
+            if created:
+                logger.info(f"✓ Создано недостающих индексов: {created}")
+
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка создания индексов: {e}")
+
+
 async def load_tasks_from_json() -> None:
     """Загружает задачи из JSON файла."""
     try:
@@ -155,6 +339,12 @@ async def main() -> None:
         logger.warning("⚠ БД не готова, пропускаем инициализацию")
         return
 
+    await migrate_match_status_column()
+    await migrate_task_hints_column()
+    await migrate_task_answer_normalized_column()
+    await migrate_user_counter_columns()
+    await create_missing_indexes()
+    await drop_obsolete_indexes()
     await load_tasks_from_json()
     await create_admin_user()
     logger.info("✓ Инициализация завершена успешно!")